@@ -0,0 +1,83 @@
+"""
+Compares the accuracy and latency of the PyTorch and the quantized ONNX FinBERT backends,
+using the tweets that were labeled with reactions in data/sentiment_data.csv.
+
+Run this from the root of the repository: `python benchmarks/sentiment_backends.py`.
+This requires the FinBERT model in ./models and the onnxruntime package.
+"""
+
+# > Standard libaries
+from __future__ import annotations
+import os
+import sys
+import time
+
+# > 3rd party dependencies
+import pandas as pd
+from transformers import pipeline
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# > Local dependencies
+import util.sentiment_analyis as sentiment
+from util.sentiment_analyis import OnnxClassifier, labels
+
+# The labels used in data/sentiment_data.csv
+csv_labels = {1: "🐂", 0: "🦆", -1: "🐻"}
+
+
+def predict(classifier, texts: list, batch_size: int) -> tuple[list, float]:
+    """
+    Returns the predicted emojis and the number of seconds it took.
+    """
+
+    emojis = []
+    start = time.perf_counter()
+
+    for i in range(0, len(texts), batch_size):
+        batch = texts[i : i + batch_size]
+        preds = classifier(batch, batch_size=len(batch), truncation=True)
+        emojis += [labels[pred["label"]][1] for pred in preds]
+
+    return emojis, time.perf_counter() - start
+
+
+def main(batch_size: int = 16) -> None:
+    if not sentiment.use_finbert:
+        print("The FinBERT model could not be loaded, see ./models")
+        return
+
+    df = pd.read_csv(
+        "data/sentiment_data.csv", header=None, names=["text", "label"]
+    ).dropna()
+    texts = df["text"].astype(str).tolist()
+    truth = df["label"].astype(int).map(csv_labels).tolist()
+
+    backends = {
+        "PyTorch": pipeline(
+            "text-classification", model=sentiment.finbert, tokenizer=sentiment.tokenizer
+        ),
+        "ONNX int8": OnnxClassifier(sentiment.finbert, sentiment.tokenizer),
+    }
+
+    results = {}
+    for name, classifier in backends.items():
+        # Warm up, so the first call does not count
+        classifier(texts[:1], batch_size=1, truncation=True)
+
+        emojis, seconds = predict(classifier, texts, batch_size)
+        results[name] = emojis
+
+        accuracy = sum(p == t for p, t in zip(emojis, truth)) / len(truth)
+        print(
+            f"{name:<10} accuracy {accuracy:6.2%}   {seconds / len(texts) * 1000:8.2f} ms per text"
+        )
+
+    agreement = sum(
+        a == b for a, b in zip(results["PyTorch"], results["ONNX int8"])
+    ) / len(texts)
+    print(f"The backends agree on {agreement:.2%} of {len(texts)} texts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Compares the symbol lookups of TV_data.get_symbol_data() using the symbol indices,
+with the DataFrame scans that were used before.
+
+Run this from the root of the repository: `python benchmarks/tv_symbol_lookup.py`.
+"""
+
+# > Standard libaries
+import os
+import sys
+import random
+import string
+import timeit
+
+# > 3rd party dependencies
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# > Local dependencies
+import util.vars
+from util.tv_data import tv, build_symbol_index
+
+
+def make_tv_db(size: int, suffixes: list = [""]) -> pd.DataFrame:
+    """
+    Makes a DataFrame that looks like the TradingView scanner data.
+    """
+
+    exchanges = ["BINANCE", "COINBASE", "KUCOIN", "NASDAQ", "NYSE", "AMEX"]
+    rows = []
+    for _ in range(size):
+        base = "".join(random.choices(string.ascii_uppercase, k=random.randint(2, 5)))
+        suffix = random.choice(suffixes)
+        exchange = random.choice(exchanges)
+        rows.append({"s": f"{exchange}:{base}{suffix}", "exchange": exchange, "stock": base + suffix})
+
+    return pd.DataFrame(rows)
+
+
+def scan_symbol_data(symbol: str, asset: str):
+    """
+    The lookup as it was done before, using a boolean mask over the full DataFrame.
+    """
+
+    if asset == "stock":
+        stock = util.vars.stocks.loc[util.vars.stocks["stock"] == symbol]
+        if not stock.empty:
+            return stock["exchange"].values[0], "america", symbol
+
+    elif asset == "crypto":
+        tv_crypto = util.vars.crypto
+        crypto = tv_crypto.loc[tv_crypto["stock"] == symbol]
+        if not crypto.empty:
+            return crypto["exchange"].values[0], "crypto", symbol
+
+        for suffix in ["USD", "USDT", "USDTPERP"]:
+            if not symbol.endswith(suffix):
+                crypto_USD = tv_crypto.loc[tv_crypto["stock"] == symbol + suffix]
+                if not crypto_USD.empty:
+                    return (
+                        crypto_USD["exchange"].values[0],
+                        "crypto",
+                        crypto_USD["stock"].values[0],
+                    )
+
+
+def main(number: int = 200) -> None:
+    random.seed(0)
+
+    util.vars.stocks = make_tv_db(10000)
+    util.vars.crypto = make_tv_db(30000, ["USD", "USDT", "USDTPERP", "BTC", ""])
+    util.vars.forex = make_tv_db(2000)
+    util.vars.tv_index = {
+        "stock": build_symbol_index(util.vars.stocks),
+        "crypto": build_symbol_index(util.vars.crypto),
+        "forex": build_symbol_index(util.vars.forex),
+    }
+
+    # Mix of known symbols, symbols that need a suffix and unknown symbols
+    queries = [
+        ("stock", random.choice(util.vars.stocks["stock"].values)) for _ in range(5)
+    ]
+    queries += [
+        ("crypto", random.choice(util.vars.crypto["stock"].values)) for _ in range(5)
+    ]
+    # Base symbols that are only listed with a suffix, these resolve through the USD/USDT/USDTPERP fallback
+    crypto_index = util.vars.tv_index["crypto"]
+    fallback_symbols = [
+        symbol[: -len(suffix)]
+        for symbol in util.vars.crypto["stock"].values
+        for suffix in ["USDTPERP", "USDT", "USD"]
+        if symbol.endswith(suffix) and symbol[: -len(suffix)] not in crypto_index
+    ]
+    queries += [("crypto", symbol) for symbol in random.sample(fallback_symbols, 5)]
+    queries += [("crypto", "NOTASYMBOL"), ("stock", "NOTASYMBOL")]
+
+    # Both methods should give the same results
+    for asset, symbol in queries:
+        assert tv.get_symbol_data(symbol, asset) == scan_symbol_data(symbol, asset)
+
+    for name, func in [
+        ("DataFrame scan", scan_symbol_data),
+        ("Symbol index", tv.get_symbol_data),
+    ]:
+        total = timeit.timeit(
+            lambda: [func(symbol, asset) for asset, symbol in queries], number=number
+        )
+        per_lookup = total / (number * len(queries)) * 1e6
+        print(f"{name:<15} {per_lookup:10.2f} µs per lookup")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,7 @@ from discord.ui import Select, View
 
 # Local dependencies
 import util.vars
-from util.db import update_db
+from util.db import upsert_rows, delete_where
 from cogs.loops.trades import Trades
 from cogs.loops.assets import Assets
 
@@ -29,13 +29,6 @@ class Portfolio(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
 
-    def update_portfolio_db(self, new_db):
-        # Set the new portfolio so other functions can access it
-        util.vars.portfolio_db = new_db
-
-        # Write to SQL database
-        update_db(new_db, "portfolio")
-
     @commands.dm_only()
     @portfolios.command(
         name="add", description="Add a cryptocurrency portfolio to the database."
@@ -132,7 +125,7 @@ class Portfolio(commands.Cog):
         util.vars.portfolio_db = pd.concat(
             [util.vars.portfolio_db, new_data], ignore_index=True
         )
-        update_db(util.vars.portfolio_db, "portfolio")
+        upsert_rows(new_data, "portfolio", ["id", "exchange", "key"])
 
         await ctx.respond(
             "Succesfully added your portfolio to the database!\n⚠️ Please ensure that you set the API for read-only access ⚠️"
@@ -167,7 +160,7 @@ class Portfolio(commands.Cog):
                     )
                 )
 
-            view = PortfolioSelectView(ctx, util.vars.portfolio_db)
+            view = PortfolioSelectView(ctx, util.vars.portfolio_db, rows.index)
             view.select_portfolio.options = options
             await ctx.respond("Select the portfolio you want to remove:", view=view)
             await view.wait()
@@ -232,10 +225,12 @@ class Portfolio(commands.Cog):
 
 
 class PortfolioSelectView(View):
-    def __init__(self, ctx, portfolio_db):
+    def __init__(self, ctx, portfolio_db, indices):
         super().__init__()
         self.ctx = ctx
         self.portfolio_db = portfolio_db
+        # The indices of the portfolios of this user, in the order of the options
+        self.indices = indices
 
     @discord.ui.select(placeholder="Select the portfolio to remove")
     async def select_portfolio(self, select: Select, interaction: Interaction):
@@ -244,8 +239,14 @@ class PortfolioSelectView(View):
                 "You are not authorized to confirm this action.", ephemeral=True
             )
 
-        index = int(select.values[0])
-        self.portfolio_db.drop(self.portfolio_db.index[index], inplace=True)
+        index = self.indices[int(select.values[0])]
+        row = self.portfolio_db.loc[index]
+        self.portfolio_db.drop(index, inplace=True)
+        delete_where(
+            "portfolio",
+            "id = ? AND exchange = ? AND key = ?",
+            (row["id"], row["exchange"], row["key"]),
+        )
         await interaction.response.send_message(
             "Successfully removed the selected portfolio from the database!",
             ephemeral=True,
@@ -4,8 +4,6 @@ import datetime
 
 # > 3rd Party Dependencies
 import pandas as pd
-import nltk
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
 
 # > Discord imports
 import discord
@@ -15,6 +13,7 @@ from discord.commands import Option
 # > Local dependencies
 from util.vars import get_json_data
 from util.confirm_stock import confirm_stock
+from util.sentiment_analyis import score_many
 
 
 class Sentiment(commands.Cog):
@@ -158,7 +157,7 @@ class Sentiment(commands.Cog):
         text_only = []
         last_date = ""
         dates = []
-        sentiment = []
+        texts = []
 
         for headline in headlines:
             date = headline[
@@ -187,17 +186,9 @@ class Sentiment(commands.Cog):
             ]
 
             text_only.append(f"[{text}]({url})")
+            texts.append(text)
 
-            try:
-                analyzer = SentimentIntensityAnalyzer()
-                sentiment.append(analyzer.polarity_scores(text)["compound"])
-            except LookupError:
-                # Download the NLTK packages
-                nltk.download("vader_lexicon")
-
-                # Try again
-                analyzer = SentimentIntensityAnalyzer()
-                sentiment.append(analyzer.polarity_scores(text)["compound"])
+        sentiment = [scores["compound"] for scores in score_many(texts)]
 
         return pd.DataFrame(
             {"Date": dates, "Headline": text_only, "Sentiment": sentiment}
@@ -3,7 +3,6 @@ import datetime
 
 # > 3rd Party Dependencies
 import pandas as pd
-import yfinance as yf
 
 # Discord imports
 import discord
@@ -13,10 +12,11 @@ from discord.commands import SlashCommandGroup, Option
 # Local dependencies
 import util.vars
 from util.vars import config
-from util.db import update_db, merge_and_update
+from util.db import merge_and_update, upsert_rows, delete_where
 from util.disc_util import get_channel
 from util.confirm_stock import confirm_stock
 from util.trades_msg import trades_msg
+from util.yf_data import yf_quotes
 
 
 class Stock(commands.Cog):
@@ -31,14 +31,19 @@ class Stock(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
 
-    def update_assets_db(self, new_db):
+    def update_assets_db(self, new_db, user_id: int, asset: str):
         """
         Updates the assets database.
+        Only the rows of the given user and asset are written to the SQL database.
 
         Parameters
         ----------
         new_db : pandas.DataFrame
-            The new database to be written to the assets database.
+            The new assets database.
+        user_id : int
+            The id of the user whose asset changed.
+        asset : str
+            The asset that changed.
 
         Returns
         -------
@@ -48,8 +53,12 @@ class Stock(commands.Cog):
         # Set the new portfolio so other functions can access it
         util.vars.assets_db = new_db
 
-        # Write to SQL database
-        update_db(new_db, "assets")
+        # Write the changed rows to SQL database
+        rows = new_db[(new_db["id"] == user_id) & (new_db["asset"] == asset)]
+        if rows.empty:
+            delete_where("assets", "id = ? AND asset = ?", (user_id, asset))
+        else:
+            upsert_rows(rows, "assets", ["id", "asset"])
 
     @stocks.command(name="add", description="Add a stock to your portfolio.")
     async def add(
@@ -100,10 +109,8 @@ class Stock(commands.Cog):
             await ctx.respond("Please provide a valid buying price and/or amount.")
             return
 
-        try:
-            price = yf.Ticker(ticker).info["regularMarketPrice"]
-        except Exception:
-            price = 0
+        stock_info = await yf_quotes.get_info(ticker)
+        price = stock_info.get("regularMarketPrice") or 0
 
         # Add ticker to database
         new_data = pd.DataFrame(
@@ -167,7 +174,7 @@ class Stock(commands.Cog):
                     "owned",
                 ] += amount
 
-            self.update_assets_db(old_db)
+            self.update_assets_db(old_db, ctx.author.id, ticker.upper())
         await ctx.respond("Succesfully added your stock to the database!")
 
         channel = get_channel(self.bot, config["LOOPS"]["TRADES"]["CHANNEL"])
@@ -217,7 +224,7 @@ class Stock(commands.Cog):
             # Update database
             if not row.empty:
                 amount = old_db.loc[row, "owned"].values[0]
-                self.update_assets_db(old_db.drop(index=row))
+                self.update_assets_db(old_db.drop(index=row), ctx.author.id, ticker)
                 await ctx.respond(
                     f"Succesfully removed all {ticker.upper()} from your owned stocks!"
                 )
@@ -242,7 +249,9 @@ class Stock(commands.Cog):
                 owned_now = row["owned"].tolist()[0]
                 # if it is equal to or greater than the amount to remove, remove all
                 if float(amount) >= owned_now:
-                    self.update_assets_db(old_db.drop(index=row.index))
+                    self.update_assets_db(
+                        old_db.drop(index=row.index), ctx.author.id, ticker
+                    )
                     await ctx.respond(
                         f"Succesfully removed all {ticker.upper()} from your owned stocks!"
                     )
@@ -252,7 +261,7 @@ class Stock(commands.Cog):
                         & (old_db["asset"] == ticker.upper()),
                         "owned",
                     ] -= float(amount)
-                    self.update_assets_db(old_db)
+                    self.update_assets_db(old_db, ctx.author.id, ticker.upper())
                     await ctx.respond(
                         f"Succesfully removed {amount} {ticker.upper()} from your owned stocks!"
                     )
@@ -260,10 +269,8 @@ class Stock(commands.Cog):
                 await ctx.respond("You do not own this stock!")
                 return
 
-        try:
-            price = yf.Ticker(ticker).info["regularMarketPrice"]
-        except Exception:
-            price = 0
+        stock_info = await yf_quotes.get_info(ticker)
+        price = stock_info.get("regularMarketPrice") or 0
 
         buying_price = row["buying_price"].tolist()[0]
 
@@ -13,9 +13,9 @@ import numpy as np
 
 # > Local dependencies
 import util.vars
-from util.yf_data import get_stock_info
+from util.yf_data import get_stock_info, yf_quotes
 from util.cg_data import get_coin_info
-from util.db import update_db
+from util.db import append_rows, delete_where
 from util.disc_util import get_channel, get_user
 from util.vars import config
 from util.disc_util import get_guild
@@ -82,7 +82,10 @@ class Assets(commands.Cog):
         None
         """
 
-        if portfolio_db.equals(util.vars.portfolio_db):
+        all_portfolios = portfolio_db.equals(util.vars.portfolio_db)
+        new_assets = []
+
+        if all_portfolios:
             # Drop all crypto assets
             if not util.vars.assets_db.empty:
                 crypto_rows = util.vars.assets_db.index[
@@ -102,6 +105,8 @@ class Assets(commands.Cog):
                 # Add this data to the assets.db database
                 exch_data = await get_data(row)
                 assets_db = pd.concat([assets_db, exch_data], ignore_index=True)
+                if isinstance(exch_data, pd.DataFrame):
+                    new_assets.append(exch_data)
 
         # Ensure that the db knows the right types
         assets_db = assets_db.astype(
@@ -115,8 +120,11 @@ class Assets(commands.Cog):
             }
         )
 
-        # Update the assets db
-        update_db(assets_db, "assets")
+        # Update the assets db, only the crypto assets have changed
+        if all_portfolios:
+            delete_where("assets", "exchange != ?", ("stock",))
+        if new_assets:
+            append_rows(pd.concat(new_assets, ignore_index=True), "assets")
         util.vars.assets_db = assets_db
 
         self.post_assets.start()
@@ -152,6 +160,10 @@ class Assets(commands.Cog):
         # Necessary to prevent panda warnings
         new_df = exchange_df.copy()
 
+        # Request the info of all stocks at once, so usd_value() can use the cached info
+        if exchange == "Stock":
+            await yf_quotes.get_info_many(new_df["asset"].tolist())
+
         # Get the price of the assets
         prices = []
         changes = []
@@ -17,7 +17,7 @@ from discord.ext.tasks import loop
 import util.vars
 from util.vars import get_json_data, config, data_sources
 from util.disc_util import get_channel, get_tagged_users
-from util.db import update_db
+from util.db import merge_and_update, delete_old_rows
 
 
 async def scraper(type: str) -> pd.DataFrame:
@@ -183,19 +183,17 @@ class TradingView_Ideas(commands.Cog):
         Adds the given id to the database.
         """
 
-        util.vars.ideas_ids = pd.concat(
-            [
-                util.vars.ideas_ids,
-                pd.DataFrame(
-                    [
-                        {
-                            "id": id,
-                            "timestamp": datetime.datetime.now(),
-                        }
-                    ]
-                ),
-            ],
-            ignore_index=True,
+        util.vars.ideas_ids = merge_and_update(
+            util.vars.ideas_ids,
+            pd.DataFrame(
+                [
+                    {
+                        "id": id,
+                        "timestamp": datetime.datetime.now(),
+                    }
+                ]
+            ),
+            "ideas_ids",
         )
 
     async def send_embed(self, df: pd.DataFrame, type: str) -> None:
@@ -230,6 +228,7 @@ class TradingView_Ideas(commands.Cog):
                 util.vars.ideas_ids["timestamp"]
                 > datetime.datetime.now() - datetime.timedelta(hours=72)
             ]
+            delete_old_rows("ideas_ids", 3)
 
         counter = 1
         for _, row in df.iterrows():
@@ -284,8 +283,6 @@ class TradingView_Ideas(commands.Cog):
             # Only show the top 10 ideas
             if counter == 11:
                 break
-        # Write to db
-        update_db(util.vars.ideas_ids, "ideas_ids")
 
     @loop(hours=24)
     async def crypto_ideas(self) -> None:
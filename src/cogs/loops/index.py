@@ -97,8 +97,11 @@ class Index(commands.Cog):
         prices = []
         changes = []
 
+        # Get the data of all indices at once
+        tv_data = await tv.get_tv_data_many(self.crypto_indices, "crypto")
+
         for index in self.crypto_indices:
-            price, change, _, exchange, _ = await tv.get_tv_data(index, "crypto")
+            price, change, _, exchange, _ = tv_data[index]
             if price == 0:
                 print(index)
                 continue
@@ -182,8 +185,11 @@ class Index(commands.Cog):
         prices = []
         changes = []
 
+        # Get the data of all indices at once
+        tv_data = await tv.get_tv_data_many(self.stock_indices, "stock")
+
         for index in self.stock_indices:
-            price, change, _, exchange, _ = await tv.get_tv_data(index, "stock")
+            price, change, _, exchange, _ = tv_data[index]
             if price == 0:
                 continue
             change = round(change, 2)
@@ -256,8 +262,11 @@ class Index(commands.Cog):
         prices = []
         changes = []
 
+        # Get the data of all indices at once
+        tv_data = await tv.get_tv_data_many(self.forex_indices, "forex")
+
         for index in self.forex_indices:
-            price, change, _, exchange, _ = await tv.get_tv_data(index, "forex")
+            price, change, _, exchange, _ = tv_data[index]
             if price == 0:
                 continue
             change = round(change, 2)
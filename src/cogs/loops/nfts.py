@@ -17,7 +17,7 @@ from discord.ext.tasks import loop
 from util.vars import get_json_data, config, data_sources
 from util.disc_util import get_channel
 from util.formatting import format_change
-from util.cg_data import cg
+from util.cg_data import coingecko
 
 
 class NFTS(commands.Cog):
@@ -158,7 +158,11 @@ class NFTS(commands.Cog):
         await self.trending_channel.send(embed=e)
 
     async def gc_trending(self):
-        df = pd.DataFrame(cg.get_search_trending()["nfts"])
+        trending = await coingecko.get("search/trending")
+        df = pd.DataFrame(trending.get("nfts", []))
+
+        if df.empty:
+            return
 
         # Add URL
         df["url"] = "https://www.coingecko.com/en/nft/" + df["id"]
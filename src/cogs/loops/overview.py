@@ -2,6 +2,7 @@
 # > Standard libraries
 from collections import Counter
 from collections import defaultdict
+import asyncio
 import datetime
 
 # > Discord dependencies
@@ -9,10 +10,10 @@ import discord
 from discord.ext.tasks import loop
 
 # Local dependencies
-import util.vars
 from util.vars import config, get_json_data
 from util.disc_util import get_channel, get_guild
 from util.formatting import format_change
+from util.mentions import mentions
 
 text_to_emoji = defaultdict(lambda: "🦆", {"bear": "🐻", "bull": "🐂", "neutral": "🦆"})
 
@@ -21,6 +22,8 @@ class Overview:
     """
     This class contains the cog for posting the top crypto and stocks mentions.
     It can be configured in the config.yaml file under ["LOOPS"]["OVERVIEW"].
+    Updates within ["LOOPS"]["OVERVIEW"]["DEBOUNCE"] seconds are combined into one post,
+    which edits the previous overview message instead of deleting it and sending a new one.
     """
 
     def __init__(self, bot):
@@ -29,6 +32,16 @@ class Overview:
         self.global_crypto = {}
         self.global_stocks = {}
 
+        # Seconds to wait for more updates before posting the overview
+        self.debounce = config["LOOPS"]["OVERVIEW"].get("DEBOUNCE", 10)
+
+        # category -> {ticker: sentiment of its last mention} since the last post
+        self.changed = {"stocks": {}, "crypto": {}}
+        # category -> the task that will post the overview
+        self.publishers = {}
+        # category -> the last overview message
+        self.messages = {}
+
         self.global_overview.start()
 
         if config["LOOPS"]["OVERVIEW"]["STOCKS"]["ENABLED"]:
@@ -52,16 +65,50 @@ class Overview:
             self.do_crypto = False
 
     async def overview(self, category, tickers, sentiment):
-        # Make sure that the new db is not empty
-        if not util.vars.tweets_db.empty:
-            if self.do_stocks and category == "stocks":
-                await self.make_overview(category, tickers, sentiment)
-            if self.do_crypto and category == "crypto":
-                await self.make_overview(category, tickers, sentiment)
+        if not (
+            (self.do_stocks and category == "stocks")
+            or (self.do_crypto and category == "crypto")
+        ):
+            return
+
+        # Remember which tickers to highlight in the next post
+        for ticker in tickers:
+            self.changed[category][ticker] = sentiment
+
+        # Post the overview once no more updates come in, unless that is already planned
+        publisher = self.publishers.get(category)
+        if publisher is None or publisher.done():
+            self.publishers[category] = asyncio.create_task(self.publish(category))
+
+    async def publish(self, category: str) -> None:
+        """
+        Waits for the debounce window, then posts the latest overview of the category.
+        Keeps going while updates come in during posting.
+
+        Parameters
+        ----------
+        category : str
+            The category of the overview, either "stocks" or "crypto".
+        """
+
+        while self.changed[category]:
+            await asyncio.sleep(self.debounce)
+
+            changed = self.changed[category]
+            self.changed[category] = {}
+
+            # Make sure that there are mentions
+            if mentions.is_empty(category):
+                continue
+
+            try:
+                await self.make_overview(category, changed)
+            except Exception as e:
+                print(f"Error posting the {category} overview:", e)
 
     @loop(minutes=5)
     async def global_overview(self):
-        if util.vars.tweets_db.empty:
+        if mentions.is_empty():
             return
 
         categories = []
@@ -71,15 +118,13 @@ class Overview:
             categories.append("crypto")
 
         for category in categories:
-            db = util.vars.tweets_db.loc[util.vars.tweets_db["category"] == category]
+            # Get the top 50 mentions
+            top50 = mentions.top(category, 50)
 
-            if db.empty:
+            if not top50:
                 return
 
-            # Get the top 50 mentions
-            top50 = db["ticker"].value_counts()[:50]
-
-            for ticker, _ in top50.items():
+            for ticker, _, _, _ in top50:
                 # Get the global tweets about the ticker using the API
                 if category == "stocks":
                     global_mentions = None  # await count_tweets(ticker)
@@ -90,43 +135,34 @@ class Overview:
                     if global_mentions is not None:
                         self.global_crypto[ticker] = await count_tweets(ticker)
 
-    async def make_overview(self, category: str, tickers: list, last_sentiment: str):
+    async def make_overview(self, category: str, changed: dict):
         # Post the overview for stocks and crypto
-        db = util.vars.tweets_db.loc[util.vars.tweets_db["category"] == category]
+        # Get the top 50 mentions
+        top50 = mentions.top(category, 50)
 
-        if db.empty:
+        if not top50:
             return
 
-        # Get the top 50 mentions
-        top50 = db["ticker"].value_counts()[:50]
-
         # Make the list for embeds
         count_list = []
         ticker_list = []
         sentiment_list = []
 
         # Add overview of sentiment for each ticker
-        for ticker, count in top50.items():
-            # Get the sentiment for the ticker
-            sentiment = db.loc[db["ticker"] == ticker]["sentiment"].tolist()
-
-            change = db.loc[db["ticker"] == ticker]["change"].tolist()[0]
-            change = change.replace("%", "").replace("+", "")
-
-            try:
-                change = format_change(float(change))
-            except ValueError:
-                change = ""  # Do not specify it
+        for ticker, count, sentiments, change in top50:
+            # Do not specify it if it is unknown
+            change = format_change(change) if change is not None else ""
 
             # Convert sentiment into a single str, i.e. "6🐂 2🦆 2🐻"
-            sentiment = [text_to_emoji[sent] for sent in sentiment]
-            sentiment = dict(Counter(sentiment))
+            sentiment = Counter()
+            for sent, sent_count in sentiments.items():
+                sentiment[text_to_emoji[sent]] += sent_count
 
             formatted_sentiment = ""
             # Use this method to sort the dict
             for emoji in ["🐂", "🦆", "🐻"]:
                 if emoji in sentiment.keys():
-                    if emoji == last_sentiment and ticker in tickers:
+                    if emoji == changed.get(ticker):
                         formatted_sentiment += f"**{sentiment[emoji]}**{emoji} "
                     else:
                         formatted_sentiment += f"{sentiment[emoji]}{emoji} "
@@ -139,16 +175,17 @@ class Overview:
                 if ticker in self.global_crypto.keys():
                     count = f"{count} - {self.global_crypto[ticker]}"
 
-            if ticker in tickers:
+            # Do not show the brackets if the change is unknown
+            label = f"{ticker} ({change})" if change else ticker
+
+            if ticker in changed:
                 # Make bold
-                ticker = f"**{ticker} ({change})**"
+                label = f"**{label}**"
                 count = f"**{count}**"
-            else:
-                ticker = f"{ticker} ({change})"
 
             # Add count, symbol, sentiment to embed lists
             count_list.append(str(count))
-            ticker_list.append(ticker)
+            ticker_list.append(label)
             sentiment_list.append(formatted_sentiment)
 
         # Make the embed
@@ -178,12 +215,27 @@ class Overview:
         )
 
         if category == "crypto":
-            # Delete previous message
-            await self.crypto_channel.purge(limit=1)
-            await self.crypto_channel.send(embed=e)
+            channel = self.crypto_channel
         else:
-            await self.stocks_channel.purge(limit=1)
-            await self.stocks_channel.send(embed=e)
+            channel = self.stocks_channel
+
+        # Edit the previous message
+        message = self.messages.get(category)
+        if message is None:
+            # The last message of the bot in this channel, e.g. from before a restart
+            async for msg in channel.history(limit=1):
+                if msg.author == self.bot.user:
+                    message = msg
+
+        if message is not None:
+            try:
+                await message.edit(embed=e)
+                self.messages[category] = message
+                return
+            except discord.NotFound:
+                pass
+
+        self.messages[category] = await channel.send(embed=e)
 
 
 async def count_tweets(ticker: str) -> int:
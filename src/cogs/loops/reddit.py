@@ -15,7 +15,7 @@ from discord.ext.tasks import loop
 import util.vars
 from util.vars import config, data_sources
 from util.disc_util import get_channel, get_webhook
-from util.db import update_db
+from util.db import merge_and_update, delete_old_rows
 
 
 class Reddit(commands.Cog):
@@ -47,19 +47,17 @@ class Reddit(commands.Cog):
         Adds the given id to the database.
         """
 
-        util.vars.reddit_ids = pd.concat(
-            [
-                util.vars.reddit_ids,
-                pd.DataFrame(
-                    [
-                        {
-                            "id": id,
-                            "timestamp": datetime.datetime.now(),
-                        }
-                    ]
-                ),
-            ],
-            ignore_index=True,
+        util.vars.reddit_ids = merge_and_update(
+            util.vars.reddit_ids,
+            pd.DataFrame(
+                [
+                    {
+                        "id": id,
+                        "timestamp": datetime.datetime.now(),
+                    }
+                ]
+            ),
+            "reddit_ids",
         )
 
     @loop(hours=12)
@@ -91,6 +89,7 @@ class Reddit(commands.Cog):
                 util.vars.reddit_ids["timestamp"]
                 > datetime.datetime.now() - datetime.timedelta(hours=72)
             ]
+            delete_old_rows("reddit_ids", 3)
 
         subreddit = await reddit.subreddit("WallStreetBets")
         try:
@@ -192,9 +191,6 @@ class Reddit(commands.Cog):
                 if counter == 11:
                     break
 
-            # Write to db
-            update_db(util.vars.reddit_ids, "reddit_ids")
-
         except Exception as e:
             print("Error getting reddit posts, error:", e)
 
@@ -1,5 +1,7 @@
 from __future__ import annotations
 from typing import List, Optional
+import asyncio
+import time
 import traceback
 
 import aiohttp
@@ -11,13 +13,21 @@ from util.vars import config
 from util.disc_util import get_channel, get_tagged_users, get_webhook
 from util.tweet_embed import make_tweet_embed
 from util.parse_tweet import parse_tweet
-from util.get_tweet import get_tweet
+from util.get_tweet import get_tweet, count
+from util.tweet_store import seen_tweets
+from util.afterhours import afterHours
 
 
 class Timeline(commands.Cog):
     """
     The main Class of this project. This class is responsible for streaming tweets from the Twitter API.
     It can be configured in the config.yaml file under ["LOOPS"]["TIMELINE"].
+
+    The tweets go through a pipeline:
+    they are parsed in order, then enriched (classification, TA, sentiment) by multiple workers at the same time,
+    then put back in their original order and posted by a publisher per channel.
+    The queues between the stages are bounded, so parsing waits if the workers cannot keep up.
+    With ["LOOPS"]["TIMELINE"]["PIPELINE"]["STRICT_ORDER"] a single publisher posts all tweets in their original order.
     """
 
     def __init__(self, bot: commands.Bot) -> None:
@@ -30,6 +40,41 @@ class Timeline(commands.Cog):
         """
         self.bot = bot
 
+        # Pipeline settings
+        pipeline_config = config["LOOPS"]["TIMELINE"].get("PIPELINE", {})
+        self.workers = pipeline_config.get("WORKERS", 4)
+        self.queue_size = pipeline_config.get("QUEUE_SIZE", 50)
+        self.strict_order = pipeline_config.get("STRICT_ORDER", False)
+
+        # The pipeline is started by the first tweet, see start_pipeline()
+        self.enrich_queue = None
+        self.tasks = []
+
+        # Limits the number of tweets between parsing and publishing
+        self.window = None
+
+        # Puts the enriched tweets back in the order they were parsed
+        self.reorder_buffer = {}
+        self.reorder_lock = None
+        self.last_seq = 0
+        self.next_seq = 0
+
+        # channel id (None if strict ordering) -> queue of tweets to post
+        self.publishers = {}
+
+        # Polling settings, in seconds
+        polling_config = config["LOOPS"]["TIMELINE"].get("POLLING", {})
+        self.min_interval = polling_config.get("MIN_INTERVAL", 30)
+        self.max_interval = polling_config.get("MAX_INTERVAL", 300)
+        self.market_max_interval = polling_config.get("MARKET_MAX_INTERVAL", 60)
+        self.target_tweets = polling_config.get("TARGET_TWEETS", 5)
+        self.backoff = polling_config.get("BACKOFF", 1.5)
+
+        # The smoothed number of new tweets per second
+        self.tweet_rate = 0
+        self.interval = self.min_interval
+        self.last_poll = None
+
         charts_channel = config["LOOPS"]["TIMELINE"]["CHARTS_CHANNEL"]
         text_channel = config["LOOPS"]["TIMELINE"]["TEXT_CHANNEL"]
 
@@ -45,6 +90,7 @@ class Timeline(commands.Cog):
 
         # Get all text channels
         self.all_txt_channels.start()
+        self.get_latest_tweet.change_interval(seconds=self.interval)
         self.get_latest_tweet.start()
 
     def set_channels(
@@ -111,9 +157,11 @@ class Timeline(commands.Cog):
 
     @loop(minutes=5)
     async def get_latest_tweet(self) -> None:
-        """Fetches the latest tweets."""
+        """Fetches the tweets posted since the previous poll and decides when to poll next."""
         tweets = await get_tweet()
 
+        items = 0
+        new_tweets = 0
         # Loop from oldest to newest tweet
         for tweet in reversed(tweets):
             tweet = tweet["content"]
@@ -122,10 +170,82 @@ class Timeline(commands.Cog):
             if tweet["entryType"] != "TimelineTimelineItem":
                 continue
 
-            await self.on_data(tweet, update_tweet_id=True)
+            items += 1
+            if await self.on_data(tweet, update_tweet_id=True):
+                new_tweets += 1
+
+        # Save the posted tweets, so they are skipped after a restart
+        seen_tweets.flush()
+
+        interval = self.next_interval(new_tweets, items >= count)
+        if interval != self.interval:
+            self.interval = interval
+            self.get_latest_tweet.change_interval(seconds=interval)
+
+    def next_interval(self, new_tweets: int, full_page: bool) -> float:
+        """Decides the number of seconds until the next poll, based on the rate of new tweets.
+        The interval aims at `TARGET_TWEETS` new tweets per poll, it is shortened directly during bursts,
+        but only grows by a factor `BACKOFF` per quiet poll.
+        During US market hours the interval is at most `MARKET_MAX_INTERVAL`.
+
+        Parameters
+        ----------
+        new_tweets : int
+            The number of new tweets in the last poll.
+        full_page : bool
+            Whether the last poll returned as many tweets as requested, in that case there might be more.
+
+        Returns
+        -------
+        float
+            The interval in seconds.
+        """
+        now = time.monotonic()
+        elapsed = self.interval if self.last_poll is None else now - self.last_poll
+        self.last_poll = now
+
+        # Exponential moving average of the tweets per second
+        rate = new_tweets / max(elapsed, 1)
+        self.tweet_rate = 0.5 * rate + 0.5 * self.tweet_rate
+
+        ceiling = self.max_interval
+        if not afterHours():
+            ceiling = min(ceiling, self.market_max_interval)
+
+        if full_page:
+            interval = self.min_interval
+        elif self.tweet_rate > 0:
+            interval = self.target_tweets / self.tweet_rate
+        else:
+            interval = ceiling
+
+        # Back off gradually when it is quiet
+        if new_tweets == 0:
+            interval = min(interval, self.interval * self.backoff)
+
+        return min(max(interval, self.min_interval), ceiling)
+
+    def start_pipeline(self) -> None:
+        """Starts the enrich workers, if they are not running yet."""
+        if self.enrich_queue is not None:
+            return
+
+        self.enrich_queue = asyncio.Queue(maxsize=self.queue_size)
+        self.window = asyncio.Semaphore(self.queue_size)
+        self.reorder_lock = asyncio.Lock()
+
+        self.tasks = [
+            asyncio.create_task(self.enrich_worker()) for _ in range(self.workers)
+        ]
 
-    async def on_data(self, tweet: dict, update_tweet_id: bool = False) -> None:
+    def cog_unload(self) -> None:
+        """Stops the pipeline when the cog is unloaded."""
+        for task in self.tasks:
+            task.cancel()
+
+    async def on_data(self, tweet: dict, update_tweet_id: bool = False) -> bool:
         """This method is called whenever data is received from the stream.
+        Parses the tweet and queues it to be enriched, waits if the queue is full.
 
         Parameters
         ----------
@@ -133,61 +253,172 @@ class Timeline(commands.Cog):
             The raw tweet data.
         update_tweet_id : bool, optional
             Whether or not to update the tweet ID, by default False
+
+        Returns
+        -------
+        bool
+            True if the tweet is new and was queued.
         """
         formatted_tweet = parse_tweet(tweet, update_tweet_id=update_tweet_id)
 
-        if formatted_tweet is not None:
-            (
-                text,
-                user_name,
-                user_screen_name,
-                user_img,
-                tweet_url,
-                media,
-                tickers,
-                hashtags,
-                e_title,
-                media_types,
-            ) = formatted_tweet
-
-            e, category, base_symbols = await make_tweet_embed(
-                text,
-                user_name,
-                user_img,
-                tweet_url,
-                media,
-                tickers,
-                hashtags,
-                e_title,
-                media_types,
-                self.bot,
-            )
-
-            # Upload the tweet to the Discord.
-            await self.upload_tweet(e, category, media, user_screen_name, base_symbols)
-
-    async def upload_tweet(
+        if formatted_tweet is None:
+            return False
+
+        self.start_pipeline()
+
+        await self.window.acquire()
+        seq = self.last_seq
+        self.last_seq += 1
+
+        await self.enrich_queue.put((seq, formatted_tweet))
+        return True
+
+    async def enrich_worker(self) -> None:
+        """Makes the embeds of the queued tweets and passes them on in their original order."""
+        while True:
+            seq, formatted_tweet = await self.enrich_queue.get()
+            tweet_id = formatted_tweet[-1]
+
+            try:
+                post = await self.enrich(formatted_tweet)
+            except Exception as error:
+                print("Error processing tweet on timeline", error)
+                print(traceback.format_exc())
+                post = None
+
+            self.enrich_queue.task_done()
+            await self.release(seq, tweet_id, post)
+
+    async def enrich(self, formatted_tweet: tuple) -> tuple:
+        """Makes the embed of the tweet and decides where it should be posted.
+
+        Parameters
+        ----------
+        formatted_tweet : tuple
+            The output of parse_tweet().
+
+        Returns
+        -------
+        tuple
+            The arguments of post_tweet().
+        """
+        (
+            text,
+            user_name,
+            user_screen_name,
+            user_img,
+            tweet_url,
+            media,
+            tickers,
+            hashtags,
+            e_title,
+            media_types,
+            _,
+        ) = formatted_tweet
+
+        e, category, base_symbols = await make_tweet_embed(
+            text,
+            user_name,
+            user_img,
+            tweet_url,
+            media,
+            tickers,
+            hashtags,
+            e_title,
+            media_types,
+            self.bot,
+        )
+
+        channel, user_channel = self.get_channels(category, media, user_screen_name)
+
+        return channel, e, media, base_symbols, user_channel, category
+
+    async def release(self, seq: int, tweet_id: int, post: Optional[tuple]) -> None:
+        """Passes the enriched tweets on to the publishers in the order they were parsed.
+
+        Parameters
+        ----------
+        seq : int
+            The position of the tweet in the parsing order.
+        tweet_id : int
+            The ID of the tweet.
+        post : tuple, optional
+            The arguments of post_tweet(), None if the tweet should not be posted.
+        """
+        self.reorder_buffer[seq] = (tweet_id, post)
+
+        # Only one worker at a time, so the tweets are queued in order
+        async with self.reorder_lock:
+            while self.next_seq in self.reorder_buffer:
+                tweet_id, post = self.reorder_buffer.pop(self.next_seq)
+                self.next_seq += 1
+                self.window.release()
+
+                if post is None:
+                    # Do not try this tweet again after a restart
+                    seen_tweets.save(tweet_id)
+                else:
+                    await self.get_publisher(post[0]).put((tweet_id, post))
+
+    def get_publisher(self, channel: discord.abc.GuildChannel) -> asyncio.Queue:
+        """Returns the queue of the publisher of the channel, starting the publisher if needed.
+
+        Parameters
+        ----------
+        channel : discord.abc.GuildChannel
+            The Discord channel where the tweet should be posted.
+
+        Returns
+        -------
+        asyncio.Queue
+            The queue of tweets that should be posted.
+        """
+        key = None if self.strict_order else channel.id
+
+        if key not in self.publishers:
+            queue = asyncio.Queue(maxsize=self.queue_size)
+            self.publishers[key] = queue
+            self.tasks.append(asyncio.create_task(self.publish_worker(queue)))
+
+        return self.publishers[key]
+
+    async def publish_worker(self, queue: asyncio.Queue) -> None:
+        """Posts the queued tweets one by one.
+        A tweet is only saved as seen once it is posted, so the tweets that are still queued during a restart are posted after it.
+        """
+        while True:
+            tweet_id, post = await queue.get()
+            try:
+                await self.post_tweet(*post)
+                seen_tweets.save(tweet_id)
+            except Exception as e:
+                # Keep the publisher running, otherwise this channel's queue stops draining
+                print(f"Error publishing tweet {tweet_id}: {e}")
+                print(traceback.format_exc())
+            finally:
+                queue.task_done()
+
+    def get_channels(
         self,
-        e: discord.Embed,
         category: Optional[str],
         media: List[str],
         user_screen_name: str,
-        tickers: List[str],
-    ) -> None:
-        """Uploads tweet in the dedicated Discord channel.
+    ) -> tuple[discord.abc.GuildChannel, Optional[discord.abc.GuildChannel]]:
+        """Decides the dedicated Discord channel of the tweet.
 
         Parameters
         ----------
-        e : discord.Embed
-            The Tweet as a Discord embed object.
         category : str, optional
             The category of the tweet, used to decide which Discord channel it should be uploaded to.
         media : list
             The images contained in this tweet.
         user_screen_name : str
             The user that posted this tweet.
-        tickers : list
-            The list of tickers contained in this tweet.
+
+        Returns
+        -------
+        tuple[discord.abc.GuildChannel, Optional[discord.abc.GuildChannel]]
+            The Discord channel and the user-specific Discord channel.
         """
         user_channel = None
 
@@ -211,7 +442,7 @@ class Timeline(commands.Cog):
         else:
             channel = self.get_channel_based_on_category(category, media)
 
-        await self.post_tweet(channel, e, media, tickers, user_channel, category)
+        return channel, user_channel
 
     def get_channel_based_on_category(
         self, category: Optional[str], media: List[str]
@@ -11,7 +11,7 @@ import ccxt
 
 # Local dependencies
 import util.vars
-from util.db import get_db, update_db
+from util.db import get_db, delete_where
 from util.disc_util import get_channel, get_user
 from util.vars import config
 from util.trades_msg import on_msg
@@ -88,7 +88,11 @@ class Trades(commands.Cog):
                         # Get the portfolio
                         util.vars.portfolio_db.drop(i, inplace=True)
 
-                        update_db(util.vars.portfolio_db, "portfolio")
+                        delete_where(
+                            "portfolio",
+                            "id = ? AND exchange = ? AND key = ?",
+                            (row["id"], row["exchange"], row["key"]),
+                        )
 
                         print(f"Removed Binance API key for {row['user']}")
 
@@ -130,13 +130,12 @@ class Yield(commands.Cog):
             The percentages of the yield for each bond.
         """
 
-        yield_percentage = []
-        for bond in bonds:
-            no_exch = bond.split(":")[1]
-            tv_data = await tv.get_tv_data(no_exch, "forex")
-            yield_percentage.append(tv_data[0])
+        no_exch = [bond.split(":")[1] for bond in bonds]
 
-        return yield_percentage
+        # Request all bonds at once, every point is needed for the curve
+        tv_data = await tv.get_tv_data_many(no_exch, "forex", partial=False)
+
+        return [tv_data[bond][0] for bond in no_exch]
 
     def make_plot(
         self, years: list, yield_percentage: list, color: str, label: str
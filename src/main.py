@@ -13,12 +13,26 @@ import discord
 from discord.ext import commands
 
 # Import local dependencies
-from util.vars import config
+from util.vars import config, close_session
 from util.disc_util import get_guild, set_emoji
+from util.tv_data import tv
+from util.yf_data import yf_quotes
+from util.sentiment_analyis import sentiment_service
+from util.ticker_store import classified_tickers
+from util.tweet_store import seen_tweets
+from util.datastore import close_connection
+
+
+class Bot(commands.Bot):
+    async def close(self) -> None:
+        """Closes the shared connections before the bot shuts down."""
+        await close_connections()
+        await super().close()
+
 
 # If getting the error about "command_prefix" run
 # `pip install git+https://github.com/Pycord-Development/pycord`
-bot = commands.Bot(intents=discord.Intents.all())
+bot = Bot(intents=discord.Intents.all())
 
 
 @bot.event
@@ -35,6 +49,23 @@ async def on_ready() -> None:
     await set_emoji(guild)
 
 
+async def close_connections() -> None:
+    """
+    Closes all long-lived connections, such as the shared HTTP session.
+    This gets called once the bot is shutting down.
+    """
+
+    await tv.quotes.close()
+    await close_session()
+    yf_quotes.close()
+    sentiment_service.close()
+
+    # Save the classifications that were not saved yet, then write all queued writes
+    classified_tickers.flush()
+    seen_tweets.flush()
+    close_connection()
+
+
 def load_folder(foldername: str) -> None:
     """
     Loads all the cogs in the given folder.
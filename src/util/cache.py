@@ -0,0 +1,154 @@
+##> Imports
+# > Standard libaries
+from __future__ import annotations
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+# Used to tell the difference between a missing key and a stored None
+_missing = object()
+
+
+class TTLCache:
+    """
+    A dictionary with a maximum size that removes the least recently used items once it is full.
+    Items can expire after a number of seconds, expired items are removed when they are accessed.
+    The number of hits and misses is counted, so the hit ratio can be monitored.
+    """
+
+    def __init__(self, max_size: int = 1000, ttl: Optional[float] = None) -> None:
+        """
+        Parameters
+        ----------
+        max_size : int, optional
+            The maximum number of items in the cache, by default 1000.
+        ttl : float, optional
+            The default number of seconds an item is valid, by default None (no expiry).
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+
+        # key -> (value, expires at)
+        self.data = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.lookup(key) is not _missing
+
+    def lookup(self, key: Hashable) -> Any:
+        """
+        Returns the value of the key without counting it as a hit or miss.
+        Removes the item if it has expired.
+        """
+
+        item = self.data.get(key)
+        if item is None:
+            return _missing
+
+        value, expires = item
+        if expires is not None and expires <= time.time():
+            del self.data[key]
+            return _missing
+
+        return value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns the value of the key, or the default if it is not in the cache or has expired.
+
+        Parameters
+        ----------
+        key : Hashable
+            The key of the item.
+        default : Any, optional
+            The value to return if the key is not found, by default None.
+
+        Returns
+        -------
+        Any
+            The cached value or the default.
+        """
+
+        value = self.lookup(key)
+
+        if value is _missing:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        self.data.move_to_end(key)
+        return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: Optional[float] = None,
+        expires: Optional[float] = None,
+    ) -> None:
+        """
+        Adds an item to the cache, removing the least recently used item if the cache is full.
+
+        Parameters
+        ----------
+        key : Hashable
+            The key of the item.
+        value : Any
+            The value of the item.
+        ttl : float, optional
+            The number of seconds the item is valid, by default the ttl of the cache.
+        expires : float, optional
+            The unix timestamp at which the item expires, overrides the ttl.
+        """
+
+        if expires is None:
+            ttl = self.ttl if ttl is None else ttl
+            expires = time.time() + ttl if ttl is not None else None
+
+        self.data[key] = (value, expires)
+        self.data.move_to_end(key)
+
+        while len(self.data) > self.max_size:
+            self.data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        item = self.data.pop(key, None)
+        return default if item is None else item[0]
+
+    def clear(self) -> None:
+        self.data.clear()
+
+    def items(self) -> list[tuple[Hashable, Any, Optional[float]]]:
+        """
+        Returns the items that have not expired, as (key, value, expires at).
+        """
+
+        now = time.time()
+        return [
+            (key, value, expires)
+            for key, (value, expires) in self.data.items()
+            if expires is None or expires > now
+        ]
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        """
+        Returns the size, hits, misses, and hit ratio of the cache.
+        """
+
+        return {
+            "size": len(self.data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hit_ratio, 3),
+        }
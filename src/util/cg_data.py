@@ -2,49 +2,225 @@
 # > Standard libaries
 from __future__ import annotations
 from typing import Optional, List
+from collections import deque
+from urllib.parse import urlencode
+import asyncio
 import numbers
+import time
 
 # > Third party libraries
-from pycoingecko import CoinGeckoAPI
 import cloudscraper
 from bs4 import BeautifulSoup
 import pandas as pd
 
 # Local dependencies
 import util.vars
-from util.vars import stables
+from util.vars import stables, get_json_data
 from util.tv_data import tv
 from util.formatting import format_change
 
-cg = CoinGeckoAPI()
 scraper = cloudscraper.create_scraper()
 
 
-def get_crypto_info(ids):
+class CoinGecko:
+    """
+    Asynchronous client for the CoinGecko API.
+    All requests share the same budget of calls per minute, if it is used up the next request waits.
+    """
+
+    base_url = "https://api.coingecko.com/api/v3"
+
+    def __init__(self, calls_per_minute: int = 50) -> None:
+        self.calls_per_minute = calls_per_minute
+
+        # The times of the calls made in the last minute
+        self.calls = deque()
+        self.lock = None
+
+    async def wait_for_budget(self) -> None:
+        """
+        Waits until a call can be made without going over the budget.
+        """
+
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+
+        async with self.lock:
+            now = time.monotonic()
+            while self.calls and now - self.calls[0] >= 60:
+                self.calls.popleft()
+
+            if len(self.calls) >= self.calls_per_minute:
+                await asyncio.sleep(60 - (now - self.calls.popleft()))
+
+            self.calls.append(time.monotonic())
+
+    async def get(self, endpoint: str, **params) -> dict | list:
+        """
+        Makes a GET request to the CoinGecko API.
+
+        Parameters
+        ----------
+        endpoint : str
+            The endpoint of the API, e.g. "coins/list".
+        **params
+            The query parameters of the request.
+
+        Returns
+        -------
+        dict | list
+            The response, an empty dict if the request failed.
+        """
+
+        await self.wait_for_budget()
+
+        url = f"{self.base_url}/{endpoint}"
+        if params:
+            url += "?" + urlencode(params)
+
+        return await get_json_data(url)
+
+    async def get_coins_list(self) -> list:
+        """
+        Gets the id, symbol, and name of all coins.
+        """
+
+        coins = await self.get("coins/list")
+        return coins if isinstance(coins, list) else []
+
+    async def get_markets(self, ids: List[str]) -> list:
+        """
+        Gets the price, volume, and market cap of multiple coins using one request.
+        """
+
+        markets = await self.get(
+            "coins/markets", vs_currency="usd", ids=",".join(ids), per_page=250
+        )
+        return markets if isinstance(markets, list) else []
+
+    async def get_coin_by_id(self, id: str) -> dict:
+        """
+        Gets the market data and tickers of a coin.
+        """
+
+        return await self.get(
+            f"coins/{id}",
+            localization="false",
+            tickers="true",
+            market_data="true",
+            community_data="false",
+            developer_data="false",
+            sparkline="false",
+        )
+
+
+coingecko = CoinGecko()
+
+# Check the longest suffixes first, so USDT is removed instead of only USD
+stable_suffixes = sorted(stables, key=len, reverse=True)
+
+
+def remove_stable_suffix(ticker: str) -> str:
+    """
+    Removes the stablecoin at the end of a ticker, e.g. BTCUSDT -> BTC.
+
+    Parameters
+    ----------
+    ticker : str
+        The ticker, possibly including a stablecoin suffix.
+
+    Returns
+    -------
+    str
+        The ticker without the suffix.
+    """
+
+    # Do not change the stablecoins themselves
+    if ticker in stables:
+        return ticker
+
+    for suffix in stable_suffixes:
+        if ticker.endswith(suffix) and len(ticker) > len(suffix):
+            return ticker[: -len(suffix)]
+
+    return ticker
+
+
+def build_cg_index(cg_coins: pd.DataFrame) -> dict[str, dict]:
+    """
+    Makes dictionaries of the CoinGecko coins, so they can be found by symbol, id, or name in O(1).
+
+    Parameters
+    ----------
+    cg_coins : pd.DataFrame
+        The CoinGecko coins list, with the columns "id", "symbol", and "name".
+
+    Returns
+    -------
+    dict[str, dict]
+        "symbol"
+            The uppercase symbol -> the ids with this symbol.
+        "id"
+            The lowercase id -> the id.
+        "name"
+            The name -> the ids with this name.
+    """
+
+    cg_index = {"symbol": {}, "id": {}, "name": {}}
+
+    if cg_coins is None or cg_coins.empty:
+        return cg_index
+
+    for id, symbol, name in zip(
+        cg_coins["id"].values, cg_coins["symbol"].values, cg_coins["name"].values
+    ):
+        cg_index["symbol"].setdefault(symbol, []).append(id)
+        cg_index["id"][str(id).lower()] = id
+        cg_index["name"].setdefault(name, []).append(id)
+
+    return cg_index
+
+
+async def get_crypto_info(ids: List[str]) -> tuple[Optional[dict], Optional[str]]:
+    """
+    Gets the information of the coin with the highest volume out of the given ids.
+    The volumes are compared using one request, only the information of the best coin is requested.
+
+    Parameters
+    ----------
+    ids : List[str]
+        The CoinGecko ids of the coins, e.g. ["bitcoin"].
+
+    Returns
+    -------
+    tuple[Optional[dict], Optional[str]]
+        dict
+            The information of the coin, as returned by the CoinGecko API.
+        str
+            The id of the coin.
+    """
+
     if len(ids) > 1:
-        id = None
-        best_vol = 0
-        coin_dict = None
-        for symbol in ids.values:
-            # Catch potential errors
-            try:
-                coin_info = cg.get_coin_by_id(symbol)
-                if "usd" in coin_info["market_data"]["total_volume"]:
-                    volume = coin_info["market_data"]["total_volume"]["usd"]
-                    if volume > best_vol:
-                        best_vol = volume
-                        id = symbol
-                        coin_dict = coin_info
-            except Exception:
-                pass
+        markets = await coingecko.get_markets(ids)
+        markets = [
+            coin
+            for coin in markets
+            if isinstance(coin.get("total_volume"), numbers.Number)
+            and coin["total_volume"] > 0
+        ]
+
+        if not markets:
+            return None, None
 
+        id = max(markets, key=lambda coin: coin["total_volume"])["id"]
     else:
-        id = ids.values[0]
-        # Try in case the CoinGecko API does not work
-        try:
-            coin_dict = cg.get_coin_by_id(id)
-        except Exception:
-            return None, None
+        id = ids[0]
+
+    coin_dict = await coingecko.get_coin_by_id(id)
+
+    # In case the CoinGecko API does not work
+    if not coin_dict or "market_data" not in coin_dict:
+        return None, None
 
     return coin_dict, id
 
@@ -140,19 +316,15 @@ async def get_coin_info(
     change = "N/A"
 
     # Remove formatting from ticker input
-    if ticker not in stables:
-        for stable in stables:
-            if ticker.endswith(stable):
-                ticker = ticker[: -len(stable)]
+    ticker = remove_stable_suffix(ticker)
 
     # Get the id of the ticker
     # Check if the symbol exists
     coin_dict = None
-    if ticker in util.vars.cg_db["symbol"].values:
+    cg_index = util.vars.cg_index
+    if ticker in cg_index["symbol"]:
         # Check coin by symbol, i.e. "BTC"
-        coin_dict, id = get_crypto_info(
-            util.vars.cg_db[util.vars.cg_db["symbol"] == ticker]["id"]
-        )
+        coin_dict, id = await get_crypto_info(cg_index["symbol"][ticker])
 
         # Get the information from the dictionary
         if coin_dict:
@@ -175,16 +347,12 @@ async def get_coin_info(
             )
 
         # Third option is to check by id
-        elif ticker.lower() in util.vars.cg_db["id"].values:
-            coin_dict, id = get_crypto_info(
-                util.vars.cg_db[util.vars.cg_db["id"] == ticker.lower()]["id"]
-            )
+        elif ticker.lower() in cg_index["id"]:
+            coin_dict, id = await get_crypto_info([cg_index["id"][ticker.lower()]])
 
         # Fourth option is to check by name, i.e. "Bitcoin"
-        elif ticker in util.vars.cg_db["name"].values:
-            coin_dict, id = get_crypto_info(
-                util.vars.cg_db[util.vars.cg_db["name"] == ticker]["id"]
-            )
+        elif ticker in cg_index["name"]:
+            coin_dict, id = await get_crypto_info(cg_index["name"][ticker])
 
         # Get the information from the dictionary
         total_vol, price, change, exchanges, base = get_info_from_dict(coin_dict)
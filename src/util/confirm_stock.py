@@ -1,18 +1,20 @@
 ## > Imports
 # > 3rd Party Dependencies
-import yfinance as yf
 import discord
 from discord.ext import commands
 from discord.ui import Button, View
 
+# Local dependencies
+from util.yf_data import yf_quotes
+
 
 async def confirm_stock(bot: commands.Bot, ctx: commands.Context, ticker: str) -> bool:
 
     # Check if this ticker exists
-    stock_info = yf.Ticker(ticker)
+    stock_info = await yf_quotes.get_info(ticker)
 
     # If it does not exist let the user know
-    if stock_info.info["regularMarketPrice"] == None:
+    if stock_info.get("regularMarketPrice") == None:
 
         confirm_button = Button(
             label="Confirm",
@@ -0,0 +1,620 @@
+##> Imports
+# > Standard libaries
+from __future__ import annotations
+import os
+import glob
+import time
+import queue
+import datetime
+import sqlite3
+import threading
+from typing import Callable, List
+
+# > 3rd party dependencies
+import numpy as np
+import pandas as pd
+
+# > Local dependencies
+from util.vars import config
+from util.formatting import parse_change
+
+# All tables are saved in a single database in the data folder
+data_dir = os.path.join(os.path.dirname(__file__), "..", "..", "data")
+db_path = os.path.join(data_dir, config.get("DATABASE", {}).get("NAME", "fintwit.db"))
+
+# table -> (columns with their type, primary key, indexed columns)
+# Tables that are not listed here, such as the TradingView and CoinGecko symbols, are stored as they are
+schemas = {
+    "tweets": (
+        {
+            "ticker": "TEXT",
+            "user": "TEXT",
+            "sentiment": "TEXT",
+            "category": "TEXT",
+            "change": "REAL",
+            "timestamp": "TIMESTAMP",
+        },
+        None,
+        ["ticker", "user", "timestamp"],
+    ),
+    "assets": (
+        {
+            "asset": "TEXT",
+            "buying_price": "REAL",
+            "owned": "REAL",
+            "exchange": "TEXT",
+            "id": "INTEGER",
+            "user": "TEXT",
+        },
+        None,
+        ["id", "asset"],
+    ),
+    "portfolio": (
+        {
+            "id": "INTEGER",
+            "user": "TEXT",
+            "exchange": "TEXT",
+            "key": "TEXT",
+            "secret": "TEXT",
+            "passphrase": "TEXT",
+        },
+        None,
+        ["id"],
+    ),
+    "reddit_ids": ({"id": "TEXT", "timestamp": "TIMESTAMP"}, ["id"], ["timestamp"]),
+    "ideas_ids": ({"id": "TEXT", "timestamp": "TIMESTAMP"}, ["id"], ["timestamp"]),
+    "classified_tickers": (
+        {
+            "ticker": "TEXT",
+            "website": "TEXT",
+            "exchanges": "TEXT",
+            "base_symbol": "TEXT",
+            "timestamp": "TIMESTAMP",
+        },
+        ["ticker"],
+        ["timestamp"],
+    ),
+    "unclassified_tickers": ({"ticker": "TEXT", "expires": "REAL"}, ["ticker"], []),
+    "seen_tweets": ({"id": "INTEGER", "timestamp": "TIMESTAMP"}, ["id"], []),
+}
+
+# Let sqlite3 store the numpy and pandas types
+sqlite3.register_adapter(np.int64, int)
+sqlite3.register_adapter(np.int32, int)
+sqlite3.register_adapter(np.float64, float)
+sqlite3.register_adapter(np.float32, float)
+sqlite3.register_adapter(np.bool_, bool)
+sqlite3.register_adapter(datetime.datetime, str)
+sqlite3.register_adapter(pd.Timestamp, lambda t: str(t.to_pydatetime()))
+
+# The connection is shared by all threads, the lock makes sure only one uses it at a time
+lock = threading.RLock()
+connection = None
+
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Returns the long-lived connection to the database, creating it if needed.
+    The first time the tables are created and the old per-table .db files are imported.
+
+    Returns
+    -------
+    sqlite3.Connection
+        The connection to the database.
+    """
+    global connection
+
+    with lock:
+        if connection is None:
+            os.makedirs(data_dir, exist_ok=True)
+            connection = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+
+            # Readers do not block the writer and the other way around
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+
+            create_tables(connection)
+            migrate_old_files()
+
+        return connection
+
+
+def close_connection() -> None:
+    """
+    Writes the queued writes and the WAL to the database and closes the connection.
+    This gets called once the bot is shutting down.
+    """
+    global connection
+
+    # Write everything that is still queued
+    writer.close()
+
+    with lock:
+        if connection is not None:
+            connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            connection.close()
+            connection = None
+
+
+def create_tables(cnx: sqlite3.Connection) -> None:
+    """
+    Creates the tables in schemas and their indexes, if they do not exist yet.
+    """
+
+    with cnx:
+        for table, (columns, primary_key, indexes) in schemas.items():
+            definition = ", ".join(
+                f'"{column}" {column_type}' for column, column_type in columns.items()
+            )
+            if primary_key:
+                definition += f", PRIMARY KEY ({', '.join(primary_key)})"
+
+            cnx.execute(f"CREATE TABLE IF NOT EXISTS {table} ({definition})")
+
+            for column in indexes:
+                cnx.execute(
+                    f'CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ("{column}")'
+                )
+
+
+def table_exists(cnx: sqlite3.Connection, table: str) -> bool:
+    return (
+        cnx.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()
+        is not None
+    )
+
+
+def coerce_types(db: pd.DataFrame, table: str) -> pd.DataFrame:
+    """
+    Converts the columns of the dataframe to the types of the table schema.
+    Values that cannot be converted become missing values.
+
+    Parameters
+    ----------
+    db : pd.DataFrame
+        The data to convert.
+    table : str
+        The name of the table.
+
+    Returns
+    -------
+    pd.DataFrame
+        The converted data.
+    """
+
+    if table not in schemas:
+        return db
+
+    db = db.copy()
+    for column, column_type in schemas[table][0].items():
+        if column not in db.columns:
+            continue
+
+        if column_type in ("INTEGER", "REAL"):
+            db[column] = pd.to_numeric(db[column], errors="coerce")
+        elif column_type == "TIMESTAMP":
+            db[column] = pd.to_datetime(db[column], errors="coerce")
+
+    return db
+
+
+def to_rows(db: pd.DataFrame, columns: list) -> list:
+    """
+    Returns the values of the columns as a list of tuples, with None for missing values.
+    """
+
+    values = db[columns].astype(object)
+    return list(values.where(values.notna(), None).itertuples(index=False, name=None))
+
+
+def read_table(table: str) -> pd.DataFrame:
+    """
+    Reads a table of the database.
+    If it does not exist an empty dataframe is returned.
+    This waits for the queued writes, so in the event loop use ``util.db.get_db_async()`` instead.
+
+    Parameters
+    ----------
+    table : str
+        The name of the table.
+
+    Returns
+    -------
+    pd.DataFrame
+        The table with the types of its schema.
+    """
+
+    cnx = get_connection()
+
+    # Make sure the queued writes are included
+    writer.flush()
+
+    with lock:
+        if not table_exists(cnx, table):
+            print(f"No {table} table found, returning empty db")
+            return pd.DataFrame()
+
+        db = pd.read_sql_query(f"SELECT * FROM {table}", cnx)
+
+    return coerce_types(db, table)
+
+
+def replace_table(db: pd.DataFrame, table: str) -> None:
+    """
+    Replaces all rows of a table with the rows of the dataframe.
+    The tables in schemas keep their types and indexes, other tables are recreated.
+    The write is done in the background by the writer.
+
+    Parameters
+    ----------
+    db : pd.DataFrame
+        The new rows of the table.
+    table : str
+        The name of the table.
+    """
+
+    writer.submit(replace_op(db, table))
+
+
+def replace_op(db: pd.DataFrame, table: str) -> Callable[[sqlite3.Connection], object]:
+    """
+    Returns the write that replaces all rows of a table with the rows of the dataframe, see replace_table().
+    """
+
+    if table not in schemas:
+        # Lists and dictionaries cannot be saved
+        db = db.copy()
+        for column in db.columns[db.dtypes == object]:
+            db[column] = db[column].map(
+                lambda x: str(x) if isinstance(x, (list, dict)) else x
+            )
+
+        # Not using to_sql, because it commits by itself and the writer could then repeat the write
+        create, query, rows = plain_insert_query(db, table)
+
+        def recreate(cnx: sqlite3.Connection) -> None:
+            cnx.execute(f'DROP TABLE IF EXISTS "{table}"')
+            cnx.execute(create)
+            if rows:
+                cnx.executemany(query, rows)
+
+        return recreate
+
+    query, rows = insert_query(db, table)
+
+    def op(cnx: sqlite3.Connection) -> None:
+        cnx.execute(f"DELETE FROM {table}")
+        if rows:
+            cnx.executemany(query, rows)
+
+    return op
+
+
+def plain_insert_query(db: pd.DataFrame, table: str) -> tuple[str, str, list]:
+    """
+    Returns the query to create a table that is not in schemas, based on the columns of the dataframe,
+    the query to insert its rows, and the rows to insert.
+    """
+
+    columns = list(db.columns)
+    names = ", ".join(f'"{column}"' for column in columns)
+    placeholders = ", ".join("?" for _ in columns)
+
+    return (
+        pd.io.sql.get_schema(db, table),
+        f'INSERT INTO "{table}" ({names}) VALUES ({placeholders})',
+        to_rows(db, columns),
+    )
+
+
+def insert_query(db: pd.DataFrame, table: str) -> tuple[str, list]:
+    """
+    Returns the query to insert the rows of the dataframe into a table in schemas and the rows to insert.
+    Rows with the same primary key as an existing row replace that row.
+    """
+
+    columns = [column for column in schemas[table][0] if column in db.columns]
+    if not columns or db.empty:
+        return "", []
+
+    names = ", ".join(f'"{column}"' for column in columns)
+    placeholders = ", ".join("?" for _ in columns)
+
+    return (
+        f"INSERT OR REPLACE INTO {table} ({names}) VALUES ({placeholders})",
+        to_rows(coerce_types(db, table), columns),
+    )
+
+
+def append_rows(db: pd.DataFrame, table: str) -> None:
+    """
+    Adds the rows of the dataframe to a table, without touching the existing rows.
+    The write is done in the background by the writer.
+
+    Parameters
+    ----------
+    db : pd.DataFrame
+        The rows to add.
+    table : str
+        The name of the table.
+    """
+
+    if db.empty:
+        return
+
+    if table not in schemas:
+        # Not using to_sql, because it commits by itself and the writer could then repeat the write
+        create, query, rows = plain_insert_query(db, table)
+        create = create.replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS", 1)
+
+        def op(cnx: sqlite3.Connection) -> None:
+            cnx.execute(create)
+            cnx.executemany(query, rows)
+
+        writer.submit(op)
+        return
+
+    query, rows = insert_query(db, table)
+    writer.submit(lambda cnx: cnx.executemany(query, rows))
+
+
+def upsert_rows(db: pd.DataFrame, table: str, key_cols: List[str]) -> None:
+    """
+    Replaces the rows of a table that have the same values in key_cols as a row of the dataframe,
+    rows that do not exist yet are added.
+    The write is done in the background by the writer.
+
+    Parameters
+    ----------
+    db : pd.DataFrame
+        The new or changed rows.
+    table : str
+        The name of a table in schemas.
+    key_cols : List[str]
+        The columns that identify a row, such as ["id", "asset"].
+    """
+
+    if db.empty:
+        return
+
+    where = " AND ".join(f'"{column}" = ?' for column in key_cols)
+    keys = to_rows(coerce_types(db, table), key_cols)
+    query, rows = insert_query(db, table)
+
+    def op(cnx: sqlite3.Connection) -> None:
+        cnx.executemany(f"DELETE FROM {table} WHERE {where}", keys)
+        cnx.executemany(query, rows)
+
+    writer.submit(op)
+
+
+def delete_where(table: str, where: str, params: tuple = ()) -> None:
+    """
+    Deletes the rows of a table that match the condition.
+    The write is done in the background by the writer.
+
+    Parameters
+    ----------
+    table : str
+        The name of the table.
+    where : str
+        The SQL condition, using ? for the parameters, e.g. "timestamp < ?".
+    params : tuple, optional
+        The values of the parameters in the condition.
+    """
+
+    def op(cnx: sqlite3.Connection) -> None:
+        if table_exists(cnx, table):
+            cnx.execute(f"DELETE FROM {table} WHERE {where}", params)
+
+    writer.submit(op)
+
+
+def execute_many(query: str, rows: list) -> None:
+    """
+    Executes the query for every row, the write is done in the background by the writer.
+    """
+
+    if rows:
+        writer.submit(lambda cnx: cnx.executemany(query, rows))
+
+
+class Writer:
+    """
+    Writes to the database in a separate thread, so disk latency never blocks the event loop.
+    The writes are queued and executed in batches, every batch is a single transaction.
+    A batch is written once it has reached the batch size or once the interval has passed since its first write.
+    """
+
+    def __init__(self, interval: float = 1, batch_size: int = 500) -> None:
+        """
+        Parameters
+        ----------
+        interval : float, optional
+            The maximum number of seconds a write waits for other writes, by default 1.
+        batch_size : int, optional
+            The maximum number of writes in one transaction, by default 500.
+        """
+        self.interval = interval
+        self.batch_size = batch_size
+
+        # Functions that take the connection and do the write, None stops the thread
+        self.queue = queue.Queue()
+        self.thread = None
+        self.thread_lock = threading.Lock()
+
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self.max_queue_depth = 0
+
+    def submit(self, op: Callable[[sqlite3.Connection], object]) -> None:
+        """
+        Adds a write to the queue.
+
+        Parameters
+        ----------
+        op : Callable[[sqlite3.Connection], object]
+            The function that does the write using the given connection.
+        """
+
+        with self.thread_lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name="db-writer", daemon=True
+                )
+                self.thread.start()
+
+        self.queue.put(op)
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+
+    def run(self) -> None:
+        stop = False
+
+        while not stop:
+            op = self.queue.get()
+            if op is None:
+                self.queue.task_done()
+                break
+
+            # Collect the writes until the batch is full or the interval has passed
+            batch = [op]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    op = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if op is None:
+                    stop = True
+                    self.queue.task_done()
+                    break
+                batch.append(op)
+
+            self.write(batch)
+            for _ in batch:
+                self.queue.task_done()
+
+    def write(self, batch: list) -> None:
+        """
+        Executes the writes in one transaction.
+        If that fails, every write is retried in its own transaction so only the failing ones are lost.
+        """
+
+        cnx = get_connection()
+        failed = 0
+
+        try:
+            with lock, cnx:
+                for op in batch:
+                    op(cnx)
+        except Exception:
+            for op in batch:
+                try:
+                    with lock, cnx:
+                        op(cnx)
+                except Exception as e:
+                    failed += 1
+                    print(f"Error writing to {os.path.basename(db_path)}: {e}")
+
+        self.written += len(batch) - failed
+        self.errors += failed
+        self.batches += 1
+
+    def flush(self) -> None:
+        """
+        Waits until all queued writes are done.
+        """
+
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.join()
+
+    def close(self) -> None:
+        """
+        Writes the queued writes and stops the thread.
+        """
+
+        with self.thread_lock:
+            if self.thread is not None and self.thread.is_alive():
+                self.queue.put(None)
+                self.thread.join()
+            self.thread = None
+
+    def queue_depth(self) -> int:
+        return self.queue.qsize()
+
+    def stats(self) -> dict:
+        """
+        Returns the queue depth, the maximum queue depth, and the number of writes, batches, and errors.
+        """
+
+        return {
+            "queue_depth": self.queue_depth(),
+            "max_queue_depth": self.max_queue_depth,
+            "written": self.written,
+            "batches": self.batches,
+            "errors": self.errors,
+        }
+
+
+writer = Writer(
+    interval=config.get("DATABASE", {}).get("WRITE_INTERVAL", 1),
+    batch_size=config.get("DATABASE", {}).get("WRITE_BATCH_SIZE", 500),
+)
+
+
+def migrate_old_files() -> int:
+    """
+    Imports the tables of the old data/<table>.db files into the database.
+    Every imported file is renamed to <table>.db.migrated, so this only happens once.
+    This is called by get_connection() once the connection is made.
+
+    Returns
+    -------
+    int
+        The number of files found.
+    """
+
+    old_files = [
+        path
+        for path in glob.glob(os.path.join(data_dir, "*.db"))
+        if os.path.abspath(path) != os.path.abspath(db_path)
+    ]
+
+    for path in old_files:
+        old_cnx = sqlite3.connect(path)
+        try:
+            tables = [
+                name
+                for (name,) in old_cnx.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table'"
+                )
+            ]
+            for table in tables:
+                db = pd.read_sql_query(f"SELECT * FROM {table}", old_cnx)
+
+                # Everything used to be saved as text, including missing values
+                db = db.replace({"None": None, "nan": None, "NaT": None})
+
+                # The changes were saved as text, e.g. "+1.23% "
+                if table == "tweets" and "change" in db.columns:
+                    db["change"] = db["change"].map(parse_change)
+
+                # Write right away instead of using the writer, so the rows are saved before the file is renamed
+                with lock, connection:
+                    replace_op(db, table)(connection)
+        except Exception as e:
+            print(f"Error migrating {path}: {e}")
+            continue
+        finally:
+            old_cnx.close()
+
+        os.replace(path, f"{path}.migrated")
+        print(f"Migrated {os.path.basename(path)} to {os.path.basename(db_path)}")
+
+    return len(old_files)
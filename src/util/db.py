@@ -1,12 +1,11 @@
 # > Standard library
-import os
 import datetime
+import asyncio
 from collections import defaultdict
+from typing import List
 
 # > 3rd party dependencies
 import pandas as pd
-import sqlite3
-from pycoingecko import CoinGeckoAPI
 from yahoo_fin.stock_info import tickers_nasdaq
 import numpy as np
 
@@ -16,8 +15,15 @@ from discord.ext.tasks import loop
 
 # > Local dependencies
 import util.vars
+from util.vars import config
 from util.tv_symbols import crypto_indices, stock_indices, all_forex_indices
-from util.tv_data import get_tv_ticker_data
+from util.tv_data import get_tv_ticker_data, build_symbol_index
+from util.cg_data import coingecko, build_cg_index
+from util.ticker_store import classified_tickers
+from util.mentions import mentions
+from util.formatting import parse_change
+from util.tweet_store import seen_tweets
+import util.datastore as datastore
 
 # Convert emoji to text
 convert_emoji = defaultdict(
@@ -33,14 +39,17 @@ class DB(commands.Cog):
         self.set_tv_db.start()
         self.set_cg_db.start()
         self.set_nasdaq_tickers.start()
+        self.save_classified_tickers.start()
 
         # Set the portfolio and assets db
         self.set_portfolio_db()
         self.set_assets_db()
         self.set_tweets_db()
+        self.set_seen_tweets_db()
         self.set_reddit_ids_db()
         self.set_ideas_ids_db()
         self.set_classified_tickers_db()
+        self.set_unclassified_tickers_db()
         self.set_options_db()
 
     def set_portfolio_db(self):
@@ -54,7 +63,10 @@ class DB(commands.Cog):
             util.vars.assets_db["id"] = util.vars.assets_db["id"].astype(np.int64)
 
     def set_tweets_db(self):
-        util.vars.tweets_db = get_db("tweets")
+        mentions.load(get_db("tweets"))
+
+    def set_seen_tweets_db(self):
+        seen_tweets.load(get_db("seen_tweets"))
 
     def set_options_db(self):
         util.vars.options_db = get_db("options")
@@ -66,7 +78,28 @@ class DB(commands.Cog):
         util.vars.ideas_ids = get_db("ideas_ids")
 
     def set_classified_tickers_db(self):
-        util.vars.classified_tickers = get_db("classified_tickers")
+        classified_tickers.load(get_db("classified_tickers"))
+
+    @loop(seconds=config.get("CLASSIFIER", {}).get("SAVE_INTERVAL", 30))
+    async def save_classified_tickers(self):
+        """
+        Saves the tickers that were classified since the last time.
+        """
+
+        classified_tickers.flush()
+
+    def set_unclassified_tickers_db(self):
+        unclassified_tickers = get_db("unclassified_tickers")
+        if unclassified_tickers.empty:
+            return
+
+        # Only add the tickers that have not expired yet
+        now = datetime.datetime.now().timestamp()
+        for ticker, expires in zip(
+            unclassified_tickers["ticker"], unclassified_tickers["expires"].astype(float)
+        ):
+            if expires > now:
+                util.vars.unclassified_tickers.set(ticker, True, expires=expires)
 
     @loop(hours=24)
     async def set_nasdaq_tickers(self):
@@ -76,7 +109,7 @@ class DB(commands.Cog):
 
         except Exception as e:
             print("Failed to get new nasdaq tickers, error:", e)
-            nasdaq_tickers = get_db("nasdaq_tickers")
+            nasdaq_tickers = await get_db_async("nasdaq_tickers")
             # Convert the dataframe to list
             util.vars.nasdaq_tickers = nasdaq_tickers.iloc[:, 0].tolist()
 
@@ -84,15 +117,21 @@ class DB(commands.Cog):
     @loop(hours=24)
     async def set_cg_db(self):
         # Saves all CoinGecko coins, maybe refresh this daily
-        cg = CoinGeckoAPI()
-        cg_coins = pd.DataFrame(cg.get_coins_list())
-        cg_coins["symbol"] = cg_coins["symbol"].str.upper()
+        cg_coins = pd.DataFrame(await coingecko.get_coins_list())
 
-        # Save cg_coins to database
-        update_db(cg_coins, "cg_coins")
+        if cg_coins.empty:
+            # Use the coins of the last time
+            print("Failed to get the CoinGecko coins list, using the database")
+            cg_coins = await get_db_async("cg_coins")
+        else:
+            cg_coins["symbol"] = cg_coins["symbol"].str.upper()
+
+            # Save cg_coins to database
+            update_db(cg_coins, "cg_coins")
 
         # Set cg_coins
         util.vars.cg_db = cg_coins
+        util.vars.cg_index = build_cg_index(cg_coins)
 
     @loop(hours=24)
     async def set_tv_db(self):
@@ -101,10 +140,11 @@ class DB(commands.Cog):
         """
 
         # In case the function below fails
-        util.vars.stocks = get_db("tv_stocks")
-        util.vars.crypto = get_db("tv_crypto")
-        util.vars.forex = get_db("tv_forex")
-        util.vars.cfd = get_db("tv_cfd")
+        util.vars.stocks = await get_db_async("tv_stocks")
+        util.vars.crypto = await get_db_async("tv_crypto")
+        util.vars.forex = await get_db_async("tv_forex")
+        util.vars.cfd = await get_db_async("tv_cfd")
+        self.set_tv_index()
 
         # Get the current symbols and exchanges on TradingView
         tv_stocks = await get_tv_ticker_data(
@@ -138,6 +178,19 @@ class DB(commands.Cog):
                 # elif name == "tv_cfd":
                 #    util.vars.cfd = db
 
+        self.set_tv_index()
+
+    def set_tv_index(self):
+        """
+        Makes the symbol indices of the TradingView data, used for fast lookups.
+        """
+
+        util.vars.tv_index = {
+            "stock": build_symbol_index(util.vars.stocks),
+            "crypto": build_symbol_index(util.vars.crypto),
+            "forex": build_symbol_index(util.vars.forex),
+        }
+
 
 def setup(bot: commands.Bot) -> None:
     bot.add_cog(DB(bot))
@@ -158,38 +211,15 @@ def merge_and_update(
     main_db: pd.DataFrame, new_data: pd.DataFrame, db_name: str
 ) -> pd.DataFrame:
     merged = pd.concat([main_db, new_data], ignore_index=True)
-    update_db(merged, db_name)
+    append_rows(new_data, db_name)
     return merged
 
 
-def clean_old_db(db, days: int = 1) -> pd.DataFrame:
-    """
-    Cleans the tweets database and returns it.
-
-    Returns
-    -------
-    pd.Dataframe
-        The cleaned tweets database.
-    """
-
-    # If the database is empty, do nothing and return
-    if db.empty:
-        return db
-
-    # Set the types
-    try:
-        db = remove_old_rows(db, days)
-        return db
-    except Exception as e:
-        print("Error in clean_old_db:", e)
-        print(db.to_string())
-
-
 def update_tweet_db(
     tickers: list, user: str, sentiment: str, categories: list, changes: list
 ) -> None:
     """
-    Updates thet tweet database variable using the info provided.
+    Adds the mentions to the rolling mention window and saves them in the tweets database.
 
     Parameters
     ----------
@@ -205,17 +235,11 @@ def update_tweet_db(
 
     # Prepare new data
     dict_list = []
+    now = datetime.datetime.now().replace(microsecond=0)
 
     for i in range(len(tickers)):
-        # Remove emoji at end
-        change = changes[i]
-        if change:
-            if "%" in change:
-                change = change[:-1]
-            else:
-                change = "None"
-        else:
-            change = "None"
+        # The change is formatted like "+1.23% 📈"
+        change = parse_change(changes[i])
 
         dict_list.append(
             {
@@ -224,49 +248,54 @@ def update_tweet_db(
                 "sentiment": convert_emoji[sentiment],
                 "category": categories[i],
                 "change": change,
+                "timestamp": now,
             }
         )
 
-    # Convert it to a dataframe
-    tweet_db = pd.DataFrame(dict_list)
+        mentions.add(
+            tickers[i], categories[i], convert_emoji[sentiment], change, now.timestamp()
+        )
+
+    delete_old_rows("tweets", 1)
+    append_rows(pd.DataFrame(dict_list), "tweets")
 
-    # Add current time
-    tweet_db["timestamp"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    util.vars.tweets_db = clean_old_db(util.vars.tweets_db, 1)
-    util.vars.tweets_db = merge_and_update(util.vars.tweets_db, tweet_db, "tweets")
+async def get_db_async(database_name: str) -> pd.DataFrame:
+    """
+    Does the same as get_db() in a separate thread,
+    so waiting for the queued writes does not block the event loop.
+    """
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, get_db, database_name)
 
 
 def get_db(database_name: str) -> pd.DataFrame:
     """
-    Get the database saved under data/<database_name>.pkl.
+    Get the table <database_name> of the database.
     If it does not exist return an empty dataframe.
 
     Parameters
     ----------
     str
-        Name of the database to get.
+        Name of the table to get.
 
     Returns
     -------
     pd.DataFrame
-        Database saved under data/<database_name>.pkl.
+        The table saved under <database_name>.
     """
 
-    script_dir = os.path.dirname(__file__)
-    db_loc = os.path.join(script_dir, "..", "..", "data", f"{database_name}.db")
-    cnx = sqlite3.connect(db_loc)
-
     try:
-        return pd.read_sql_query(f"SELECT * FROM {database_name}", cnx)
-    except Exception:
-        print(f"No {database_name}.db found, returning empty db")
+        return datastore.read_table(database_name)
+    except Exception as e:
+        print(f"Error reading {database_name}: {e}, returning empty db")
         return pd.DataFrame()
 
 
 def update_db(db: pd.DataFrame, database_name: str) -> None:
     """
-    Update the database saved under data/database_name.pkl using db as the new database.
+    Update the table <database_name> of the database using db as the new table.
 
     Parameters
     ----------
@@ -280,16 +309,80 @@ def update_db(db: pd.DataFrame, database_name: str) -> None:
     None
     """
 
-    db_loc = f"data/{database_name}.db"
-
-    # Convert everything to string to prevent errors
-    db = db.applymap(str)
-
     try:
-        db.to_sql(
-            database_name, sqlite3.connect(db_loc), if_exists="replace", index=False
-        )
+        datastore.replace_table(db, database_name)
     except Exception as e:
         print(
-            f"Error updating {database_name}.db: {e}.\nTried to update database:\n{db.to_string()}"
+            f"Error updating {database_name}: {e}.\nTried to update database:\n{db.to_string()}"
         )
+
+
+def append_rows(db: pd.DataFrame, database_name: str) -> None:
+    """
+    Adds the rows of db to the table <database_name>, the existing rows are not rewritten.
+
+    Parameters
+    ----------
+    pd.DataFrame
+        The new rows.
+    str
+        Name of the database to add the rows to.
+    """
+
+    try:
+        datastore.append_rows(db, database_name)
+    except Exception as e:
+        print(f"Error appending to {database_name}: {e}")
+
+
+def upsert_rows(db: pd.DataFrame, database_name: str, key_cols: List[str]) -> None:
+    """
+    Replaces the rows of the table <database_name> with the same key_cols values as the rows of db,
+    the other rows are added.
+
+    Parameters
+    ----------
+    pd.DataFrame
+        The new or changed rows.
+    str
+        Name of the database to update.
+    List[str]
+        The columns that identify a row, e.g. ["id", "asset"].
+    """
+
+    try:
+        datastore.upsert_rows(db, database_name, key_cols)
+    except Exception as e:
+        print(f"Error upserting to {database_name}: {e}")
+
+
+def delete_where(database_name: str, where: str, params: tuple = ()) -> None:
+    """
+    Deletes the rows of the table <database_name> that match the condition.
+
+    Parameters
+    ----------
+    str
+        Name of the database to delete the rows from.
+    str
+        The SQL condition, e.g. "timestamp < ?".
+    tuple
+        The parameters of the condition.
+    """
+
+    try:
+        datastore.delete_where(database_name, where, params)
+    except Exception as e:
+        print(f"Error deleting from {database_name}: {e}")
+
+
+def delete_old_rows(database_name: str, days: float) -> None:
+    """
+    Deletes the rows of the table <database_name> that are older than the number of days.
+    """
+
+    delete_where(
+        database_name,
+        "timestamp < ?",
+        (datetime.datetime.now() - datetime.timedelta(days=days),),
+    )
@@ -1,6 +1,7 @@
 # Standard libaries
 from math import log, floor
 import datetime
+from typing import Optional
 
 # Third party libraries
 import pandas as pd
@@ -27,6 +28,30 @@ def format_change(change: float) -> str:
     return f"+{change}% 📈" if change > 0 else f"{change}% 📉"
 
 
+def parse_change(change) -> Optional[float]:
+    """
+    Converts a change formatted by format_change() back to a float, e.g. "+1.23% 📈" -> 1.23.
+
+    Parameters
+    ----------
+    change : str
+        The formatted change.
+
+    Returns
+    -------
+    Optional[float]
+        The percentual change, None if it is unknown.
+    """
+
+    if not isinstance(change, str) or "%" not in change:
+        return None
+
+    try:
+        return float(change.split("%")[0])
+    except ValueError:
+        return None
+
+
 def human_format(number: float, absolute: bool = False, decimals: int = 0) -> str:
     """
     Takes a number and returns a human readable string.
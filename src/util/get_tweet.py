@@ -1,10 +1,52 @@
 import json
+import urllib.parse
+from typing import List, Optional
 
 from util.vars import config, get_json_data
 
-# Maybe improve this using params with variables and features
+# The GraphQL endpoint of the "Following" timeline
 # see https://github.com/HitomaruKonpaku/twspace-crawler/blob/7c98653f4915a8690491052e2a1415cc7beb74ab/src/api/api/twitter-graphql.api.ts#L213
-url = "https://twitter.com/i/api/graphql/g9l6dvixcXvObSkIE8Pajg/HomeLatestTimeline?variables=%7B%22count%22%3A40%2C%22cursor%22%3A%22DAABCgABF0rqRkTAJxEKAAIXSuo3TZYAAQgAAwAAAAEAAA%22%2C%22includePromotedContent%22%3Atrue%2C%22latestControlAvailable%22%3Atrue%2C%22requestContext%22%3A%22ptr%22%7D&features=%7B%22rweb_lists_timeline_redesign_enabled%22%3Atrue%2C%22responsive_web_graphql_exclude_directive_enabled%22%3Atrue%2C%22verified_phone_label_enabled%22%3Afalse%2C%22creator_subscriptions_tweet_preview_api_enabled%22%3Atrue%2C%22responsive_web_graphql_timeline_navigation_enabled%22%3Atrue%2C%22responsive_web_graphql_skip_user_profile_image_extensions_enabled%22%3Afalse%2C%22tweetypie_unmention_optimization_enabled%22%3Atrue%2C%22responsive_web_edit_tweet_api_enabled%22%3Atrue%2C%22graphql_is_translatable_rweb_tweet_is_translatable_enabled%22%3Atrue%2C%22view_counts_everywhere_api_enabled%22%3Atrue%2C%22longform_notetweets_consumption_enabled%22%3Atrue%2C%22responsive_web_twitter_article_tweet_consumption_enabled%22%3Afalse%2C%22tweet_awards_web_tipping_enabled%22%3Afalse%2C%22freedom_of_speech_not_reach_fetch_enabled%22%3Atrue%2C%22standardized_nudges_misinfo%22%3Atrue%2C%22tweet_with_visibility_results_prefer_gql_limited_actions_policy_enabled%22%3Atrue%2C%22longform_notetweets_rich_text_read_enabled%22%3Atrue%2C%22longform_notetweets_inline_media_enabled%22%3Atrue%2C%22responsive_web_media_download_video_enabled%22%3Afalse%2C%22responsive_web_enhance_cards_enabled%22%3Afalse%7D&fieldToggles=%7B%22withArticleRichContentState%22%3Afalse%7D"
+base_url = "https://twitter.com/i/api/graphql/g9l6dvixcXvObSkIE8Pajg/HomeLatestTimeline"
+
+# The number of tweets requested per call
+count = config["LOOPS"]["TIMELINE"].get("POLLING", {}).get("COUNT", 40)
+
+variables = {
+    "count": count,
+    "includePromotedContent": True,
+    "latestControlAvailable": True,
+    "requestContext": "launch",
+}
+
+features = {
+    "rweb_lists_timeline_redesign_enabled": True,
+    "responsive_web_graphql_exclude_directive_enabled": True,
+    "verified_phone_label_enabled": False,
+    "creator_subscriptions_tweet_preview_api_enabled": True,
+    "responsive_web_graphql_timeline_navigation_enabled": True,
+    "responsive_web_graphql_skip_user_profile_image_extensions_enabled": False,
+    "tweetypie_unmention_optimization_enabled": True,
+    "responsive_web_edit_tweet_api_enabled": True,
+    "graphql_is_translatable_rweb_tweet_is_translatable_enabled": True,
+    "view_counts_everywhere_api_enabled": True,
+    "longform_notetweets_consumption_enabled": True,
+    "responsive_web_twitter_article_tweet_consumption_enabled": False,
+    "tweet_awards_web_tipping_enabled": False,
+    "freedom_of_speech_not_reach_fetch_enabled": True,
+    "standardized_nudges_misinfo": True,
+    "tweet_with_visibility_results_prefer_gql_limited_actions_policy_enabled": True,
+    "longform_notetweets_rich_text_read_enabled": True,
+    "longform_notetweets_inline_media_enabled": True,
+    "responsive_web_media_download_video_enabled": False,
+    "responsive_web_enhance_cards_enabled": False,
+}
+
+field_toggles = {
+    "withArticleRichContentState": False,
+}
+
+# The top cursor of the previous response, the next request only returns the tweets after it
+top_cursor = None
 
 headers = {
     "Origin": "https://twitter.com",
@@ -43,33 +85,99 @@ cookies = {
 }
 
 
-async def get_tweet():
+def make_url(cursor: Optional[str] = None) -> str:
+    """
+    Makes the URL of the timeline request.
+
+    Parameters
+    ----------
+    cursor : str, optional
+        The top cursor of the previous response, by default None.
+        Without a cursor the latest tweets are requested.
+
+    Returns
+    -------
+    str
+        The URL of the request.
+    """
+
+    request_variables = dict(variables)
+    if cursor:
+        # Pull to refresh, only returns the tweets newer than the cursor
+        request_variables["cursor"] = cursor
+        request_variables["requestContext"] = "ptr"
+
+    params = {
+        "variables": json.dumps(request_variables, separators=(",", ":")),
+        "features": json.dumps(features, separators=(",", ":")),
+        "fieldToggles": json.dumps(field_toggles, separators=(",", ":")),
+    }
+
+    return f"{base_url}?{urllib.parse.urlencode(params)}"
+
+
+def get_top_cursor(entries: List[dict]) -> Optional[str]:
+    """
+    Returns the value of the top cursor in the timeline entries.
+
+    Parameters
+    ----------
+    entries : List[dict]
+        The entries of the timeline response.
+
+    Returns
+    -------
+    Optional[str]
+        The top cursor, None if there is none.
+    """
+
+    for entry in entries:
+        content = entry.get("content", {})
+        if (
+            content.get("entryType") == "TimelineTimelineCursor"
+            and content.get("cursorType") == "Top"
+        ):
+            return content.get("value")
+
+    return None
+
+
+async def get_tweet() -> List[dict]:
+    """
+    Gets the tweets posted since the previous call, or the latest tweets on the first call.
+
+    Returns
+    -------
+    List[dict]
+        The entries of the timeline, including the cursors.
+    """
+    global top_cursor
+
     result = await get_json_data(
-        url,
+        make_url(top_cursor),
         headers=headers,
         cookies=cookies,
         text=False,
     )
 
-    if "data" in result:
-        if "home" in result["data"]:
-            if "home_timeline_urt" in result["data"]["home"]:
-                if "instructions" in result["data"]["home"]["home_timeline_urt"]:
-                    if (
-                        "entries"
-                        in result["data"]["home"]["home_timeline_urt"]["instructions"][
-                            0
-                        ]
-                    ):
-                        return result["data"]["home"]["home_timeline_urt"][
-                            "instructions"
-                        ][0]["entries"]
-
     try:
-        result["data"]["home"]["home_timeline_urt"]["instructions"][0]["entries"]
+        instructions = result["data"]["home"]["home_timeline_urt"]["instructions"]
     except Exception as e:
         print("Error: wrong json format\n", e)
         with open("tweet_error.json", "w") as f:
             json.dump(result, f, indent=4)
 
+        # Start over with the latest tweets
+        top_cursor = None
         return []
+
+    # The entries can be split over multiple instructions
+    entries = []
+    for instruction in instructions:
+        entries += instruction.get("entries", [])
+
+    cursor = get_top_cursor(entries)
+    if cursor:
+        top_cursor = cursor
+
+    return entries
@@ -0,0 +1,174 @@
+##> Imports
+# > Standard libaries
+from __future__ import annotations
+import time
+import heapq
+from collections import Counter, defaultdict, deque
+from typing import List, Optional
+
+# > 3rd party dependencies
+import pandas as pd
+
+
+class MentionWindow:
+    """
+    Counts the mentions of tickers during a rolling time window, such as the last 24 hours.
+    The mentions are added to time buckets, once a bucket is older than the window its counts are subtracted again.
+    This makes adding a mention O(1) and expiring O(buckets), independent of the number of tweets.
+    Per category and ticker the number of mentions, the sentiment tallies, and the latest change are kept.
+    """
+
+    def __init__(self, hours: float = 24, bucket_minutes: float = 5) -> None:
+        """
+        Parameters
+        ----------
+        hours : float, optional
+            The length of the window in hours, by default 24.
+        bucket_minutes : float, optional
+            The length of a time bucket in minutes, by default 5.
+        """
+        self.window = hours * 60 * 60
+        self.bucket_size = bucket_minutes * 60
+
+        # (bucket start, {(category, ticker): Counter of sentiments})
+        self.buckets = deque()
+
+        # category -> ticker -> number of mentions
+        self.counts = defaultdict(Counter)
+        # category -> ticker -> Counter of sentiments
+        self.sentiments = defaultdict(dict)
+        # category -> ticker -> (change, timestamp)
+        self.changes = defaultdict(dict)
+
+    def add(
+        self,
+        ticker: str,
+        category: str,
+        sentiment: str,
+        change: Optional[float] = None,
+        timestamp: Optional[float] = None,
+    ) -> None:
+        """
+        Adds a mention of a ticker.
+
+        Parameters
+        ----------
+        ticker : str
+            The mentioned ticker.
+        category : str
+            The category of the ticker, e.g. "crypto" or "stocks".
+        sentiment : str
+            The sentiment of the tweet, "bull", "bear", or "neutral".
+        change : float, optional
+            The percentual price change of the ticker at the time of the tweet.
+        timestamp : float, optional
+            The unix timestamp of the tweet, by default now.
+        """
+
+        if timestamp is None:
+            timestamp = time.time()
+
+        start = timestamp - timestamp % self.bucket_size
+
+        # Mentions are added in order, older ones (from the database) are added before the new ones
+        if not self.buckets or self.buckets[-1][0] < start:
+            self.buckets.append((start, defaultdict(Counter)))
+        bucket = self.buckets[-1][1]
+
+        bucket[(category, ticker)][sentiment] += 1
+        self.counts[category][ticker] += 1
+        self.sentiments[category].setdefault(ticker, Counter())[sentiment] += 1
+
+        if change is not None and not pd.isna(change):
+            latest = self.changes[category].get(ticker)
+            if latest is None or latest[1] <= timestamp:
+                self.changes[category][ticker] = (change, timestamp)
+
+        self.expire()
+
+    def expire(self, now: Optional[float] = None) -> None:
+        """
+        Removes the buckets that are older than the window.
+        """
+
+        if now is None:
+            now = time.time()
+
+        while self.buckets and self.buckets[0][0] + self.bucket_size <= now - self.window:
+            _, bucket = self.buckets.popleft()
+
+            for (category, ticker), sentiments in bucket.items():
+                self.counts[category][ticker] -= sum(sentiments.values())
+                self.sentiments[category][ticker].subtract(sentiments)
+
+                if self.counts[category][ticker] <= 0:
+                    del self.counts[category][ticker]
+                    del self.sentiments[category][ticker]
+                    self.changes[category].pop(ticker, None)
+
+    def is_empty(self, category: Optional[str] = None) -> bool:
+        self.expire()
+
+        if category is None:
+            return not any(self.counts.values())
+        return not self.counts[category]
+
+    def top(self, category: str, n: int = 50) -> List[tuple[str, int, Counter, Optional[float]]]:
+        """
+        Returns the most mentioned tickers of a category.
+
+        Parameters
+        ----------
+        category : str
+            The category of the tickers, e.g. "crypto" or "stocks".
+        n : int, optional
+            The number of tickers to return, by default 50.
+
+        Returns
+        -------
+        List[tuple[str, int, Counter, Optional[float]]]
+            The ticker, the number of mentions, the sentiment tallies, and the latest change (None if unknown).
+        """
+
+        self.expire()
+
+        counts = self.counts[category]
+        top = heapq.nlargest(n, counts.items(), key=lambda item: item[1])
+
+        return [
+            (
+                ticker,
+                count,
+                +self.sentiments[category][ticker],
+                self.changes[category].get(ticker, (None, None))[0],
+            )
+            for ticker, count in top
+        ]
+
+    def load(self, db: pd.DataFrame) -> None:
+        """
+        Adds the mentions of the tweets database, e.g. after a restart.
+
+        Parameters
+        ----------
+        db : pd.DataFrame
+            The tweets database with the ticker, category, sentiment, change, and timestamp columns.
+        """
+
+        if db.empty:
+            return
+
+        db = db.sort_values("timestamp")
+        # The timestamps are saved in local time
+        timestamps = pd.to_datetime(db["timestamp"]).map(
+            lambda t: t.to_pydatetime().timestamp()
+        )
+
+        for ticker, category, sentiment, change, timestamp in zip(
+            db["ticker"], db["category"], db["sentiment"], db["change"], timestamps
+        ):
+            self.add(ticker, category, sentiment, change, timestamp)
+
+
+# The mentions of the last 24 hours, used for the overview
+mentions = MentionWindow()
@@ -5,6 +5,7 @@ from typing import List
 
 # > Local imports
 import util.vars
+from util.tweet_store import seen_tweets
 
 
 def remove_twitter_url_at_end(text: str) -> str:
@@ -103,10 +104,9 @@ def parse_tweet(tweet: dict, update_tweet_id: bool = False):
 
     # So we can use this function recursively
     if update_tweet_id:
-        # Skip this tweet
-        if tweet_id <= util.vars.latest_tweet_id:
+        # Skip this tweet if it has been processed before
+        if not seen_tweets.add(tweet_id):
             return
-        util.vars.latest_tweet_id = tweet_id
 
     # Get user info
     user_name = get_user_info(tweet, "name")  # The name of the account (not @username)
@@ -159,6 +159,7 @@ def parse_tweet(tweet: dict, update_tweet_id: bool = False):
             r_hashtags,
             _,
             r_media_types,
+            _,
         ) = parse_tweet(result)
 
         if reply:
@@ -205,4 +206,5 @@ def parse_tweet(tweet: dict, update_tweet_id: bool = False):
         hashtags,
         e_title,
         media_types,
+        tweet_id,
     )
@@ -1,6 +1,14 @@
 ##> Imports
 # > Standard libaries
 from __future__ import annotations
+from typing import List, Optional
+import os
+import re
+import asyncio
+import hashlib
+import queue
+import threading
+import time
 
 # > Third party libraries
 import discord
@@ -9,6 +17,59 @@ import nltk
 import numpy as np
 from nltk.sentiment.vader import SentimentIntensityAnalyzer
 
+try:
+    import torch
+except ImportError:
+    torch = None
+
+# > Local dependencies
+from util.vars import config
+from util.cache import TTLCache
+
+
+def load_vader() -> Optional[SentimentIntensityAnalyzer]:
+    """
+    Loads the VADER analyzer, downloading its lexicon if it is not installed yet.
+    """
+
+    try:
+        return SentimentIntensityAnalyzer()
+    except LookupError:
+        # Download the NLTK packages
+        nltk.download("vader_lexicon", quiet=True)
+
+    try:
+        return SentimentIntensityAnalyzer()
+    except Exception as e:
+        print("Could not load the VADER lexicon. Error:", e)
+
+
+# Load the lexicon once at startup, the analyzer is shared by everything that uses VADER
+vader = load_vader()
+
+
+def score_many(texts: List[str]) -> List[dict]:
+    """
+    Scores the sentiment of the texts using VADER.
+
+    Parameters
+    ----------
+    texts : List[str]
+        The texts to score.
+
+    Returns
+    -------
+    List[dict]
+        The neg, neu, pos, and compound scores of every text.
+        The scores are neutral if the VADER lexicon could not be loaded.
+    """
+
+    if vader is None:
+        return [{"neg": 0.0, "neu": 1.0, "pos": 0.0, "compound": 0.0} for _ in texts]
+
+    polarity_scores = vader.polarity_scores
+    return [polarity_scores(text) for text in texts]
+
 
 # Load model
 try:
@@ -20,7 +81,297 @@ except Exception as e:
     use_finbert = False
     print("Did not load premium model...")
 
-def classify_sentiment(text: str) -> tuple[str,str]:
+
+def export_onnx(model: BertForSequenceClassification, tokenizer: BertTokenizer, path: str) -> None:
+    """
+    Exports the model to ONNX, with a dynamic batch size and sequence length.
+    """
+
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    dummy = tokenizer(["The stock is going up"], return_tensors="pt")
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    # Return a tuple instead of a ModelOutput, so it can be traced
+    return_dict = model.config.return_dict
+    model.config.return_dict = False
+    model.eval()
+
+    try:
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(dummy[name] for name in names),
+                path,
+                input_names=names,
+                output_names=["logits"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14,
+            )
+    finally:
+        model.config.return_dict = return_dict
+
+
+class OnnxClassifier:
+    """
+    Runs FinBERT with ONNX Runtime, using a copy of the model with its weights dynamically quantized to int8.
+    The quantized model is made once and saved in the model directory.
+    It is called the same way as the transformers pipeline and returns the same labels.
+    """
+
+    def __init__(
+        self,
+        model: BertForSequenceClassification,
+        tokenizer: BertTokenizer,
+        model_dir: str = "./models/onnx",
+        threads: Optional[int] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        model : BertForSequenceClassification
+            The fine-tuned FinBERT model.
+        tokenizer : BertTokenizer
+            The tokenizer of the model.
+        model_dir : str, optional
+            The directory to save the ONNX models in, by default "./models/onnx".
+        threads : int, optional
+            The number of threads ONNX Runtime uses, by default it decides itself.
+        """
+        import onnxruntime as ort
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        self.tokenizer = tokenizer
+        self.id2label = model.config.id2label
+
+        path = os.path.join(model_dir, "finbert.onnx")
+        quantized_path = os.path.join(model_dir, "finbert.int8.onnx")
+
+        if not os.path.exists(quantized_path):
+            os.makedirs(model_dir, exist_ok=True)
+            export_onnx(model, tokenizer, path)
+            quantize_dynamic(path, quantized_path, weight_type=QuantType.QInt8)
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+
+        self.session = ort.InferenceSession(
+            quantized_path, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {node.name for node in self.session.get_inputs()}
+
+    def __call__(
+        self, texts: List[str], batch_size: Optional[int] = None, truncation: bool = True
+    ) -> List[dict]:
+        if isinstance(texts, str):
+            texts = [texts]
+
+        inputs = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=truncation,
+            max_length=512,
+            return_tensors="np",
+        )
+        feed = {
+            name: values.astype(np.int64)
+            for name, values in inputs.items()
+            if name in self.input_names
+        }
+        logits = self.session.run(["logits"], feed)[0]
+
+        # Softmax, to get the same scores as the pipeline
+        probs = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probs = probs / probs.sum(axis=1, keepdims=True)
+
+        return [
+            {"label": self.id2label[int(i)], "score": float(prob[i])}
+            for i, prob in zip(probs.argmax(axis=1), probs)
+        ]
+
+
+# Use the ONNX backend if it is enabled and available
+if use_finbert and config.get("SENTIMENT", {}).get("BACKEND", "pytorch") == "onnx":
+    try:
+        nlp = OnnxClassifier(
+            finbert, tokenizer, threads=config.get("SENTIMENT", {}).get("THREADS", 2)
+        )
+    except Exception as e:
+        print("Could not load the ONNX sentiment model, using PyTorch instead. Error:", e)
+
+# The FinBERT labels and their corresponding prediction and emoji
+labels = {
+    "Positive": ("🐂 - Bullish", "🐂"),
+    "Neutral": ("🦆 - Neutral", "🦆"),
+    "Negative": ("🐻 - Bearish", "🐻"),
+}
+
+
+class SentimentService:
+    """
+    Runs FinBERT in a separate thread, so the inference does not block the event loop.
+    Texts that come in at about the same time are classified together in one batch.
+    A batch is started once it has reached the batch size or the oldest text has waited for the maximum latency.
+    """
+
+    def __init__(
+        self, batch_size: int = 16, max_latency: float = 0.05, threads: Optional[int] = None
+    ) -> None:
+        """
+        Parameters
+        ----------
+        batch_size : int, optional
+            The maximum number of texts in one batch, by default 16.
+        max_latency : float, optional
+            The maximum number of seconds a text waits for other texts, by default 0.05.
+        threads : int, optional
+            The number of threads torch uses for the inference, by default torch decides.
+        """
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.threads = threads
+
+        # (text, future, event loop), None stops the thread
+        self.queue = queue.Queue()
+        self.thread = None
+        self.thread_lock = threading.Lock()
+
+        self.texts = 0
+        self.batches = 0
+
+    def start(self) -> None:
+        with self.thread_lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name="sentiment", daemon=True
+                )
+                self.thread.start()
+
+    def run(self) -> None:
+        # Pin the number of threads, so the inference does not take all cores
+        if self.threads and torch is not None:
+            torch.set_num_threads(self.threads)
+
+        stop = False
+        while not stop:
+            item = self.queue.get()
+            if item is None:
+                break
+
+            # Collect the texts until the batch is full or the first text has waited long enough
+            batch = [item]
+            deadline = time.monotonic() + self.max_latency
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self.predict(batch)
+
+    def predict(self, batch: list) -> None:
+        """
+        Classifies the texts of the batch in one forward pass and sets the results of their futures.
+        """
+
+        texts = [text for text, _, _ in batch]
+
+        try:
+            preds = nlp(texts, batch_size=len(texts), truncation=True)
+            results = [labels[pred["label"]] for pred in preds]
+        except Exception as e:
+            for _, future, loop in batch:
+                loop.call_soon_threadsafe(set_future, future, None, e)
+            return
+
+        for (_, future, loop), result in zip(batch, results):
+            loop.call_soon_threadsafe(set_future, future, result, None)
+
+        self.texts += len(batch)
+        self.batches += 1
+
+    async def classify_many(self, texts: List[str]) -> List[tuple[str, str]]:
+        """
+        Classifies the sentiment of the texts.
+
+        Parameters
+        ----------
+        texts : List[str]
+            The texts to classify.
+
+        Returns
+        -------
+        List[tuple[str, str]]
+            The prediction, e.g. "🐂 - Bullish", and the emoji of every text.
+        """
+
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in texts]
+
+        self.start()
+        for text, future in zip(texts, futures):
+            self.queue.put((text, future, loop))
+
+        return list(await asyncio.gather(*futures))
+
+    def close(self) -> None:
+        """
+        Classifies the queued texts and stops the thread.
+        """
+
+        with self.thread_lock:
+            if self.thread is not None and self.thread.is_alive():
+                self.queue.put(None)
+                self.thread.join()
+            self.thread = None
+
+    def stats(self) -> dict:
+        """
+        Returns the number of queued texts, classified texts, and batches.
+        """
+
+        return {
+            "queue_depth": self.queue.qsize(),
+            "texts": self.texts,
+            "batches": self.batches,
+            "avg_batch_size": round(self.texts / self.batches, 2) if self.batches else 0,
+        }
+
+
+def set_future(future: asyncio.Future, result, exception: Optional[Exception]) -> None:
+    # The future could have been cancelled in the meantime
+    if future.done():
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
+
+
+sentiment_config = config.get("SENTIMENT", {})
+sentiment_service = SentimentService(
+    batch_size=sentiment_config.get("BATCH_SIZE", 16),
+    max_latency=sentiment_config.get("MAX_LATENCY", 0.05),
+    threads=sentiment_config.get("THREADS", 2),
+)
+
+# Normalized text hash -> (prediction, emoji), the hit ratio can be found using sentiment_cache.stats()
+sentiment_cache = TTLCache(max_size=sentiment_config.get("CACHE_SIZE", 5000))
+
+# Used to normalize the texts
+url_pattern = re.compile(r"https?://\S+|www\.\S+")
+quote_pattern = re.compile(r"^\s*>\s?", re.MULTILINE)
+
+
+async def classify_sentiment(text: str) -> tuple[str, str]:
     """
     Uses the text of a tweet to classify the sentiment of the tweet.
 
@@ -31,28 +382,14 @@ def classify_sentiment(text: str) -> tuple[str,str]:
 
     Returns
     -------
-    np.ndarray
-        The probability of the tweet being bullish, neutral, or bearish.
+    tuple[str, str]
+        The prediction, e.g. "🐂 - Bullish", and the emoji.
     """
-    
-    pred = nlp(text)[0]
-    label = pred['label']
-    
-    if label == "Positive":
-        label = "🐂 - Bullish"
-        emoji = "🐂"
-    elif label == "Neutral":
-        label = "🦆 - Neutral"
-        emoji = "🦆"
-    elif label == "Negative":
-        label = "🐻 - Bearish"
-        emoji = "🐻"
-        
-    #score = round(score*100, 2)
-        
-    return label, emoji
-
-def add_sentiment(e : discord.Embed, text: str) -> tuple[discord.Embed, str]:
+
+    return (await sentiment_service.classify_many([text]))[0]
+
+
+async def add_sentiment(e : discord.Embed, text: str) -> tuple[discord.Embed, str]:
     """
     Adds sentiment to a discord embed, based on the given text.
 
@@ -72,21 +409,65 @@ def add_sentiment(e : discord.Embed, text: str) -> tuple[discord.Embed, str]:
             The sentiment of the tweet.
     """
     
+    prediction, emoji = await get_sentiment(text)
+    
+    e.add_field(
+        name="Sentiment",
+        value=f"{prediction}",
+        inline=False,
+    )
+    
+    return e, emoji
+
+
+def normalize_text(text: str) -> str:
+    """
+    Removes the quote formatting and URLs of a text and collapses its whitespace.
+    Retweets and cross-posted headlines are the same after normalizing.
+    """
+
+    text = quote_pattern.sub("", text)
+    text = url_pattern.sub("", text)
+    return " ".join(text.split())
+
+
+def text_key(text: str) -> str:
+    """
+    Returns the hash of the normalized text, used as the key of the sentiment cache.
+    """
+
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+async def get_sentiment(text: str) -> tuple[str, str]:
+    """
+    Classifies the sentiment of a text, using the cached result if the same text has been classified before.
+
+    Parameters
+    ----------
+    text : str
+        The text to classify the sentiment of.
+
+    Returns
+    -------
+    tuple[str, str]
+        The prediction, e.g. "🐂 - Bullish", and the emoji.
+    """
+
     # Remove quote tweet formatting
     if use_finbert:
-        prediction, emoji = classify_sentiment(text.split('\n\n> [@')[0])
+        text = text.split('\n\n> [@')[0]
+
+    key = text_key(text)
+    cached = sentiment_cache.get(key)
+    if cached is not None:
+        return cached
+
+    if use_finbert:
+        prediction, emoji = await classify_sentiment(text)
     else:
-        try:
-            analyzer = SentimentIntensityAnalyzer()
-            sentiment = analyzer.polarity_scores(text)
-        except LookupError:
-            # Download the NLTK packages
-            nltk.download("vader_lexicon")
-
-            # Try again
-            analyzer = SentimentIntensityAnalyzer()
-            sentiment = analyzer.polarity_scores(text)
-            
+        sentiment = score_many([text])[0]
+
         neg = sentiment['neg']
         neu = sentiment['neu']
         pos = sentiment['pos']
@@ -94,11 +475,6 @@ def add_sentiment(e : discord.Embed, text: str) -> tuple[discord.Embed, str]:
         # Pick the highest value
         prediction = ['🐻 - Bearish', '🦆 - Neutral', '🐂 - Bullish'][np.argmax([neg, neu, pos])]
         emoji = prediction[0]
-    
-    e.add_field(
-        name="Sentiment",
-        value=f"{prediction}",
-        inline=False,
-    )
-    
-    return e, emoji
\ No newline at end of file
+
+    sentiment_cache.set(key, (prediction, emoji))
+    return prediction, emoji
\ No newline at end of file
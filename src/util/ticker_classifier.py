@@ -2,23 +2,37 @@
 # > Standard libaries
 from __future__ import annotations
 from typing import Optional, List
+import asyncio
+import time
+
+# > 3rd party dependencies
+import pandas as pd
 
 # Local dependencies
+import util.vars
+from util.vars import config
+from util.db import upsert_rows, delete_where
 from util.tv_data import tv
 from util.tv_symbols import currencies
-from util.cg_data import get_coin_info
+from util.cg_data import get_coin_info, remove_stable_suffix
 from util.yf_data import get_stock_info
 
 async def get_financials(ticker: str, website : str):
     if "coingecko" in website:
-        _, _, _, price, change, _ = await get_coin_info(ticker)
-        four_h_ta, one_d_ta = tv.get_tv_TA(ticker, "crypto")
+        coin_info, (four_h_ta, one_d_ta) = await asyncio.gather(
+            get_coin_info(ticker), tv.get_tv_TA(ticker, "crypto")
+        )
+        _, _, _, price, change, _ = coin_info
     elif "yahoo" in website:
-        _, _, _, price, change, _ = await get_stock_info(ticker)
-        four_h_ta, one_d_ta = tv.get_tv_TA(ticker, "stock")
+        stock_info, (four_h_ta, one_d_ta) = await asyncio.gather(
+            get_stock_info(ticker), tv.get_tv_TA(ticker, "stock")
+        )
+        _, _, _, price, change, _ = stock_info
     elif "forex" in website:
-        _, _, _, price, change, _ = await get_stock_info(ticker, "forex")
-        four_h_ta, one_d_ta = tv.get_tv_TA(ticker, "forex")
+        forex_info, (four_h_ta, one_d_ta) = await asyncio.gather(
+            get_stock_info(ticker, "forex"), tv.get_tv_TA(ticker, "forex")
+        )
+        _, _, _, price, change, _ = forex_info
                 
     return price, change, four_h_ta, one_d_ta
     
@@ -80,7 +94,7 @@ async def get_best_guess(ticker: str, asset_type: str):
         ) = await get_stock_info(ticker, asset_type)
 
         if price > 0:
-            four_h_ta, one_d_ta = tv.get_tv_TA(ticker, "forex")
+            four_h_ta, one_d_ta = await tv.get_tv_TA(ticker, "forex")
             return (
                 volume,
                 website,
@@ -103,7 +117,7 @@ async def get_best_guess(ticker: str, asset_type: str):
         if base_sym == None:
             print("No base symbol found for", ticker)
             base_sym = ticker
-        four_h_ta, one_d_ta = tv.get_tv_TA(base_sym, asset_type)
+        four_h_ta, one_d_ta = await tv.get_tv_TA(base_sym, asset_type)
 
     return (
         volume,
@@ -119,10 +133,14 @@ async def get_best_guess(ticker: str, asset_type: str):
 
 
 async def classify_ticker(
-    ticker: str, majority: str
+    ticker: str, majority: str, speculative: Optional[bool] = None
 ) -> Optional[tuple[float, str, List[str], float, str, str, str]]:
     """
     Main function to classify the ticker as crypto or stock.
+    In speculative mode the forex, crypto, and stock guesses are made concurrently,
+    the guesses are still used in the same order so the outcome does not depend on which one is the fastest.
+    The crypto guess is only started up front if the ticker is known by CoinGecko, to save its rate limit.
+    The classification returns as soon as the guess with the highest priority is confident, the others are cancelled.
 
     Parameters
     ----------
@@ -130,6 +148,8 @@ async def classify_ticker(
         The ticker of the coin or stock.
     majority : str
         The guessed majority of the ticker.
+    speculative : bool, optional
+        Whether to make all guesses at once, by default the value of ["CLASSIFIER"]["SPECULATIVE"] in the config.
 
     Returns
     -------
@@ -151,31 +171,164 @@ async def classify_ticker(
         str
             The base ticker.
     """
-    
+
+    # Do not look up tickers that could not be classified recently
+    if util.vars.unclassified_tickers.get(ticker):
+        return None
+
+    if speculative is None:
+        speculative = config.get("CLASSIFIER", {}).get("SPECULATIVE", True)
+
+    guesses = {}
+
+    # Collects the failed requests of the guesses, they inherit this context when they are started
+    errors = []
+    token = util.vars.request_errors.set(errors)
+
+    def guess(asset_type: str) -> asyncio.Future:
+        # Start the guess if it has not been started yet
+        if asset_type not in guesses:
+            guesses[asset_type] = asyncio.ensure_future(
+                get_best_guess(ticker, asset_type)
+            )
+        return guesses[asset_type]
+
+    if speculative:
+        guess("forex")
+        if in_cg_index(ticker):
+            guess("crypto")
+        guess("stock")
+
+    try:
+        ticker_info = await decide_classification(ticker, majority, guess)
+    finally:
+        util.vars.request_errors.reset(token)
+
+        # Stop the guesses that are not needed anymore
+        for task in guesses.values():
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                # Retrieve the exception, so it does not get logged as unhandled
+                task.exception()
+
+    # Only remember the ticker if every source answered, a failed request says nothing about the ticker
+    # Before the symbol indices are loaded valid tickers cannot be classified either
+    if ticker_info is None and not errors and indices_loaded():
+        add_unclassified_ticker(ticker)
+
+    return ticker_info
+
+
+def in_cg_index(ticker: str) -> bool:
+    """
+    Checks if the ticker is known by CoinGecko, using the same formatting as get_best_guess() and get_coin_info().
+
+    Parameters
+    ----------
+    ticker : str
+        The ticker mentioned in a tweet, e.g. BTCUSDT
+
+    Returns
+    -------
+    bool
+        True if the ticker is a symbol, id, or name in util.vars.cg_index.
+    """
+
+    if ticker.endswith("BTC") and ticker != "BTC":
+        ticker = ticker[:-3]
+    ticker = remove_stable_suffix(ticker)
+
+    cg_index = util.vars.cg_index
+    return (
+        ticker in cg_index["symbol"]
+        or ticker.lower() in cg_index["id"]
+        or ticker in cg_index["name"]
+    )
+
+
+def indices_loaded() -> bool:
+    """
+    Checks if the CoinGecko and TradingView symbol indices have been loaded, see util.db.DB.
+
+    Returns
+    -------
+    bool
+        True if both indices contain symbols.
+    """
+
+    return bool(util.vars.cg_index["symbol"]) and any(util.vars.tv_index.values())
+
+
+def add_unclassified_ticker(ticker: str) -> None:
+    """
+    Adds the ticker to the tickers that could not be classified and saves them in the database.
+    The ticker will not be looked up again until it expires, see ["CLASSIFIER"]["UNCLASSIFIED_TTL"] in the config.
+    The hit ratio of these tickers can be found using util.vars.unclassified_tickers.stats().
+
+    Parameters
+    ----------
+    ticker : str
+        The ticker that could not be classified.
+    """
+
+    now = time.time()
+    expires = now + util.vars.unclassified_tickers.ttl
+    util.vars.unclassified_tickers.set(ticker, True, expires=expires)
+
+    upsert_rows(
+        pd.DataFrame([{"ticker": ticker, "expires": expires}]),
+        "unclassified_tickers",
+        ["ticker"],
+    )
+    delete_where("unclassified_tickers", "expires < ?", (now,))
+
+
+async def decide_classification(
+    ticker: str, majority: str, guess
+) -> Optional[tuple[float, str, List[str], float, str, str, str]]:
+    """
+    Decides the classification of a ticker using the best guesses per asset type.
+    A guess is only awaited once it is needed, so the first confident guess decides the outcome.
+
+    Parameters
+    ----------
+    ticker : str
+        The ticker of the coin or stock.
+    majority : str
+        The guessed majority of the ticker.
+    guess : Callable[[str], asyncio.Future]
+        Returns the result of get_best_guess() for the given asset type.
+
+    Returns
+    -------
+    Optional[tuple[float, str, List[str], float, str, str, str]]
+        The same as classify_ticker().
+    """
+
     # Try forex first
-    forex_data = await get_best_guess(ticker, "forex")
+    forex_data = await guess("forex")
     if forex_data[-1] == True:
         return forex_data[:-1]
 
     # If the majority is crypto or unkown check if the ticker is a crypto
     if majority == "crypto":
-        crypto_data = await get_best_guess(ticker, "crypto")
+        crypto_data = await guess("crypto")
         
         if crypto_data[-1] == True:
             return crypto_data[:-1]
 
-        stock_data = await get_best_guess(ticker, "stock")
+        stock_data = await guess("stock")
 
     elif majority == "stocks":
-        stock_data = await get_best_guess(ticker, "stock")
+        stock_data = await guess("stock")
 
         if stock_data[-1] == True:
             return stock_data[:-1]
 
-        crypto_data = await get_best_guess(ticker, "crypto")
+        crypto_data = await guess("crypto")
     else:
-        crypto_data = await get_best_guess(ticker, "crypto")
-        stock_data = await get_best_guess(ticker, "stock")
+        crypto_data, stock_data = await asyncio.gather(guess("crypto"), guess("stock"))
         
     # If it was not the majority, compare the data
     c_volume = crypto_data[0]
@@ -183,7 +336,7 @@ async def classify_ticker(
 
     if c_volume > s_volume and c_volume > 50000:
         if crypto_data[5] is None:
-            four_h_ta, one_d_ta = tv.get_tv_TA(ticker, "crypto")
+            four_h_ta, one_d_ta = await tv.get_tv_TA(ticker, "crypto")
 
             crypto_data = list(crypto_data)
             crypto_data[5] = four_h_ta
@@ -194,7 +347,7 @@ async def classify_ticker(
 
     elif c_volume < s_volume:
         if stock_data[5] is None:
-            four_h_ta, one_d_ta = tv.get_tv_TA(ticker, "stock")
+            four_h_ta, one_d_ta = await tv.get_tv_TA(ticker, "stock")
 
             stock_data = list(stock_data)
             stock_data[5] = four_h_ta
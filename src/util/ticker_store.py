@@ -0,0 +1,163 @@
+##> Imports
+# > Standard libaries
+from __future__ import annotations
+import time
+import datetime
+import threading
+from typing import List, Optional
+
+# > 3rd party dependencies
+import pandas as pd
+
+# > Local dependencies
+from util.vars import config
+from util.datastore import execute_many, delete_where
+
+
+class ClassifiedTickers:
+    """
+    Keeps the classified tickers in a dictionary, so a ticker can be looked up without scanning a dataframe.
+    Tickers expire after a number of days, expired tickers are removed when they are accessed.
+    New tickers are saved in batches by flush(), which only upserts the changed rows instead of rewriting the table.
+    """
+
+    def __init__(self, days: float = 3, database_name: str = "classified_tickers") -> None:
+        """
+        Parameters
+        ----------
+        days : float, optional
+            The number of days a classification is valid, by default 3.
+        database_name : str, optional
+            The name of the database the tickers are saved in, by default "classified_tickers".
+        """
+        self.ttl = days * 24 * 60 * 60
+        self.database_name = database_name
+
+        # ticker -> (website, exchanges, base symbol, expires at)
+        self.tickers = {}
+
+        # ticker -> row that still needs to be saved
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def __contains__(self, ticker: str) -> bool:
+        return self.get(ticker) is not None
+
+    def load(self, db: pd.DataFrame) -> None:
+        """
+        Adds the tickers saved in the database that have not expired yet.
+
+        Parameters
+        ----------
+        db : pd.DataFrame
+            The classified_tickers database.
+        """
+
+        if db.empty:
+            return
+
+        now = time.time()
+        timestamps = pd.to_datetime(db["timestamp"])
+
+        for ticker, website, exchanges, base_symbol, timestamp in zip(
+            db["ticker"], db["website"], db["exchanges"], db["base_symbol"], timestamps
+        ):
+            # The timestamps are saved in local time
+            expires = timestamp.to_pydatetime().timestamp() + self.ttl
+            if expires > now:
+                exchanges = exchanges.split(";") if exchanges else []
+                self.tickers[ticker] = (website, exchanges, base_symbol, expires)
+
+    def get(self, ticker: str) -> Optional[tuple[str, List[str], str]]:
+        """
+        Returns the classification of a ticker, or None if it is unknown or has expired.
+
+        Parameters
+        ----------
+        ticker : str
+            The ticker to look up.
+
+        Returns
+        -------
+        Optional[tuple[str, List[str], str]]
+            The website, exchanges, and base symbol of the ticker.
+        """
+
+        item = self.tickers.get(ticker)
+        if item is None:
+            return None
+
+        website, exchanges, base_symbol, expires = item
+        if expires <= time.time():
+            del self.tickers[ticker]
+            return None
+
+        return website, exchanges, base_symbol
+
+    def add(
+        self, ticker: str, website: str, exchanges: Optional[List[str]], base_symbol: str
+    ) -> None:
+        """
+        Adds the classification of a ticker, it will be saved on the next flush().
+
+        Parameters
+        ----------
+        ticker : str
+            The classified ticker.
+        website : str
+            The website of the ticker.
+        exchanges : Optional[List[str]]
+            The exchanges the ticker is listed on.
+        base_symbol : str
+            The base symbol of the ticker.
+        """
+
+        exchanges = exchanges or []
+        now = datetime.datetime.now()
+
+        self.tickers[ticker] = (website, exchanges, base_symbol, now.timestamp() + self.ttl)
+
+        with self.lock:
+            self.pending[ticker] = (
+                ticker,
+                website,
+                ";".join(exchanges),
+                base_symbol,
+                str(now),
+            )
+
+    def flush(self) -> int:
+        """
+        Queues the new classifications to be saved in the database and removes the expired ones.
+
+        Returns
+        -------
+        int
+            The number of queued classifications.
+        """
+
+        with self.lock:
+            rows = list(self.pending.values())
+            self.pending = {}
+
+        if not rows:
+            return 0
+
+        cutoff = datetime.datetime.now() - datetime.timedelta(seconds=self.ttl)
+
+        execute_many(
+            f"INSERT OR REPLACE INTO {self.database_name} "
+            "(ticker, website, exchanges, base_symbol, timestamp) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        delete_where(self.database_name, "timestamp < ?", (cutoff,))
+
+        return len(rows)
+
+
+classified_tickers = ClassifiedTickers(
+    days=config.get("CLASSIFIER", {}).get("CLASSIFIED_DAYS", 3)
+)
@@ -9,7 +9,7 @@ import discord
 # Local dependencies
 import util.vars
 import util.trades_msg
-from util.db import get_db, update_db
+from util.db import append_rows, delete_where
 from util.vars import stables
 from util.exchange_data import get_data, get_usd_price, get_buying_price
 from util.formatting import format_change
@@ -69,7 +69,8 @@ async def on_msg(msg: list,
     )
 
     # Assets db: asset, owned (quantity), exchange, id, user
-    assets_db = get_db("assets")
+    assets_db = util.vars.assets_db
+    new_assets = await get_data(row)
 
     # Drop all rows for this user and exchange
     updated_assets_db = assets_db.drop(
@@ -79,10 +80,12 @@ async def on_msg(msg: list,
     )
 
     assets_db = pd.concat(
-        [updated_assets_db, await get_data(row)]
+        [updated_assets_db, new_assets]
     ).reset_index(drop=True)
 
-    update_db(assets_db, "assets")
+    delete_where("assets", "id = ? AND exchange = ?", (row['id'], exchange.id))
+    if isinstance(new_assets, pd.DataFrame):
+        append_rows(new_assets, "assets")
     util.vars.assets_db = assets_db
     # Maybe post the updated assets of this user as well
 
@@ -1,23 +1,30 @@
 ## > Imports
 # > Standard libaries
 from __future__ import annotations
-import re
 import json
 import random
 import string
+import asyncio
+import functools
+import time
 import traceback
+from collections import OrderedDict
 from typing import Optional, List
 
 # > 3rd party dependencies
 import aiohttp
 import pandas as pd
-from tradingview_ta import TA_Handler, Interval
+from tradingview_ta import Interval, get_multiple_analysis
 
 # > Local dependencies
 import util.vars
-from util.vars import get_json_data
+from util.vars import config, get_json_data, get_session, report_request_error
+from util.cache import TTLCache
 from util.tv_symbols import stock_indices, crypto_indices, all_forex_indices
 
+# The TradingView screener that is used for each asset type
+markets = {"stock": "america", "crypto": "crypto", "forex": "forex"}
+
 
 async def get_tv_ticker_data(url, append_to=None):
     data = await get_json_data(url)
@@ -38,28 +45,285 @@ async def get_tv_ticker_data(url, append_to=None):
     return tv_data
 
 
-class TV_data:
+def format_message(func: str, args: List[str]) -> str:
     """
-    This class is used to get the current price, 24h change, and volume of a stock.
-    It also includes methods to get the TradingView TA data.
+    Formats a message in the way that the TradingView websocket expects it.
+
+    Parameters
+    ----------
+    func : str
+        The function to call, all start with ``quote_`` followed by the function name.
+    args : List[str]
+        The list of arguments to send in the message.
+
+    Returns
+    -------
+    str
+        The message prepended with its length.
     """
 
-    def __init__(self) -> None:
-        self.stock_indices_without_exch = [sym.split(":")[1] for sym in stock_indices]
-        self.crypto_indices_without_exch = [sym.split(":")[1] for sym in crypto_indices]
-        self.forex_indices_without_exch = [
-            sym.split(":")[1] for sym in all_forex_indices
-        ]
+    as_json = json.dumps({"m": func, "p": args}, separators=(",", ":"))
+    return "~m~" + str(len(as_json)) + "~m~" + as_json
 
-    async def on_msg(
-        self, ws: aiohttp.ClientWebSocketResponse, msg
-    ) -> Optional[tuple[float, float, float]]:
+
+def split_frames(data: str) -> List[str]:
+    """
+    Splits a websocket message of TradingView into the separate frames it contains.
+    A message looks like ``~m~<length>~m~<payload>~m~<length>~m~<payload>``.
+
+    Parameters
+    ----------
+    data : str
+        The raw message received from the websocket.
+
+    Returns
+    -------
+    List[str]
+        The payloads of the frames.
+    """
+
+    frames = []
+    while data.startswith("~m~"):
+        length_end = data.find("~m~", 3)
+        if length_end == -1:
+            break
+
+        start = length_end + 3
+        length = int(data[3:length_end])
+        frames.append(data[start : start + length])
+        data = data[start + length :]
+
+    return frames
+
+
+class TV_quotes:
+    """
+    Keeps a single websocket connection with TradingView open to stream the quotes of many symbols.
+    Symbols get added to the quote session the first time they are requested,
+    after that their latest price, change, and volume are kept up to date in ``self.quotes``.
+    The connection is restored automatically if it drops.
+    Quotes from before a disconnect, or that have not been updated for ["TRADINGVIEW"]["QUOTE_MAX_AGE"] seconds,
+    are treated as missing, so the caller falls back to another source.
+    """
+
+    url = "wss://data.tradingview.com/socket.io/websocket"
+
+    def __init__(self, max_symbols: int = 500, max_age: float = 600) -> None:
+        self.max_symbols = max_symbols
+        self.max_age = max_age
+
+        self.ws = None
+        self.session_id = None
+        self.listener = None
+        self.connected = None
+
+        # The latest values per symbol, e.g. {"BINANCE:BTCUSDT" : {"lp": ..., "ch": ..., "volume": ...}}
+        self.quotes = {}
+        # The time of the last update per symbol
+        self.updated = {}
+        # Symbols that TradingView does not know
+        self.errors = set()
+        # The subscribed symbols, ordered by when they were last requested
+        # Each symbol has an event that is set once its first quote (or an error) came in
+        self.subscribed = OrderedDict()
+
+    def start(self) -> None:
+        """
+        Starts listening to the websocket, if that is not happening already.
+        """
+
+        if self.listener is None or self.listener.done():
+            self.connected = asyncio.Event()
+            self.listener = asyncio.create_task(self.listen())
+
+    async def close(self) -> None:
+        """
+        Stops listening and closes the websocket connection.
+        """
+
+        if self.listener is not None:
+            self.listener.cancel()
+            self.listener = None
+
+        if self.ws is not None:
+            await self.ws.close()
+            self.ws = None
+
+    async def listen(self) -> None:
+        """
+        Connects to the websocket and handles all incoming messages.
+        Reconnects with an increasing delay if the connection gets lost.
+        """
+
+        retries = 0
+
+        while True:
+            try:
+                session = await get_session()
+                async with session.ws_connect(
+                    url=self.url,
+                    headers={"Origin": "https://data.tradingview.com"},
+                ) as ws:
+                    self.ws = ws
+                    await self.create_session()
+                    retries = 0
+
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            await self.on_msg(msg.data)
+                        elif msg.type == aiohttp.WSMsgType.ERROR:
+                            print("TradingView websocket Error")
+                            break
+
+            except asyncio.CancelledError:
+                raise
+
+            except aiohttp.ClientError:
+                print("Temporary TradingView websocket error")
+
+            except Exception:
+                print(traceback.format_exc())
+
+            self.ws = None
+            self.connected.clear()
+
+            # The quotes are not updated while disconnected, wait for new ones after reconnecting
+            self.quotes.clear()
+            self.updated.clear()
+            for event in self.subscribed.values():
+                event.clear()
+
+            # Wait a bit longer after each failed attempt, at most 1 minute
+            await asyncio.sleep(min(2**retries, 60))
+            retries += 1
+
+    async def create_session(self) -> None:
+        """
+        Creates a new quote session and subscribes all previously requested symbols again.
+        """
+
+        # This is mandatory to get the data
+        self.session_id = "qs_" + "".join(
+            random.choice(string.ascii_lowercase) for _ in range(12)
+        )
+
+        await self.send("quote_create_session", [self.session_id])
+        await self.send("quote_set_fields", [self.session_id, "ch", "lp", "volume"])
+
+        # Symbols requested from now on will be added by get_quote()
+        symbols = list(self.subscribed)
+        self.connected.set()
+
+        if symbols:
+            await self.send("quote_add_symbols", [self.session_id, *symbols])
+
+    async def send(self, func: str, args: List[str]) -> None:
+        """
+        Sends a message to the TradingView websocket.
+
+        Parameters
+        ----------
+        func : str
+            The function to call, all start with ``quote_`` followed by the function name.
+        args : List[str]
+            The list of arguments to send in the message.
+        """
+
+        await self.ws.send_str(format_message(func, args))
+
+    async def on_msg(self, data: str) -> None:
+        """
+        Parses a message from the TradingView websocket and updates the quotes.
+
+        Parameters
+        ----------
+        data : str
+            The raw message received from the websocket.
         """
-        Parses the message from the TradingView API.
+
+        for frame in split_frames(data):
+            # Heartbeat, send it back to keep the connection alive
+            if frame.startswith("~h~"):
+                await self.ws.send_str("~m~" + str(len(frame)) + "~m~" + frame)
+                continue
+
+            try:
+                msg = json.loads(frame)
+            except json.JSONDecodeError:
+                continue
+
+            if not isinstance(msg, dict) or "m" not in msg:
+                continue
+
+            if msg["m"] == "qsd":
+                info = msg["p"][1]
+                symbol = info["n"]
+
+                if info.get("s") == "error":
+                    self.errors.add(symbol)
+                    self.set_ready(symbol)
+                    continue
+
+                quote = self.quotes.setdefault(symbol, {})
+                quote.update(info.get("v", {}))
+                self.updated[symbol] = time.monotonic()
+
+                if all(key in quote for key in ("lp", "ch", "volume")):
+                    self.set_ready(symbol)
+
+            # All the fields that TradingView has for this symbol have been sent
+            elif msg["m"] == "quote_completed":
+                self.set_ready(msg["p"][1])
+
+    def set_ready(self, symbol: str) -> None:
+        if symbol in self.subscribed:
+            self.subscribed[symbol].set()
+
+    async def subscribe(self, symbols: List[str]) -> None:
+        """
+        Adds the symbols that are not yet subscribed to the quote session.
+        If there are too many subscribed symbols, the least recently requested ones are removed.
+
+        Parameters
+        ----------
+        symbols : List[str]
+            The symbols formatted as "exchange:symbol".
+        """
+
+        self.start()
+
+        new_symbols = []
+        for symbol in symbols:
+            if symbol in self.subscribed:
+                self.subscribed.move_to_end(symbol)
+            else:
+                self.subscribed[symbol] = asyncio.Event()
+                new_symbols.append(symbol)
+
+        old_symbols = []
+        while len(self.subscribed) > max(self.max_symbols, len(symbols)):
+            symbol, _ = self.subscribed.popitem(last=False)
+            self.quotes.pop(symbol, None)
+            self.updated.pop(symbol, None)
+            self.errors.discard(symbol)
+            old_symbols.append(symbol)
+
+        # If the websocket is not connected, the symbols get added once it is
+        if self.connected.is_set():
+            if old_symbols:
+                await self.send(
+                    "quote_remove_symbols", [self.session_id, *old_symbols]
+                )
+            if new_symbols:
+                await self.send("quote_add_symbols", [self.session_id, *new_symbols])
+
+    def get_values(self, symbol: str) -> Optional[tuple[float, float, float]]:
+        """
+        Returns the current price, 24h change, and volume of a subscribed symbol.
 
         Returns
         -------
-        Optional[tuple[float, float, float, str]]
+        Optional[tuple[float, float, float]]
             float
                 The current price.
             float
@@ -68,79 +332,331 @@ class TV_data:
                 The current volume.
         """
 
-        try:
-            # Try again
-            if '"m":' not in msg:
-                return None
-            elif Res := re.findall("^.*?({.*)$", msg):
-                jsonRes = json.loads(Res[0].split("~m~")[0])
-                if "m" in jsonRes.keys():
-                    if jsonRes["m"] == "qsd":
-                        try:
-                            price = float(jsonRes["p"][1]["v"]["lp"])
-                            change = float(jsonRes["p"][1]["v"]["ch"])
-                            volume = float(jsonRes["p"][1]["v"]["volume"])
-                        except KeyError:
-                            print("KeyError in TradingView ws_data")
-                            return None
-
-                        if price != 0:
-                            perc_change = round((change / price) * 100, 2)
-                        else:
-                            print("TradingView returns price=0")
-                            return None
-
-                        return price, perc_change, volume
-            else:
-                # ping packet
-                pingStr = re.findall(".......(.*)", msg)
-                if len(pingStr) != 0:
-                    pingStr = pingStr[0]
-                    ws.send_str("~m~" + str(len(pingStr)) + "~m~" + pingStr)
+        if symbol in self.errors:
+            return None
 
-                return None
-        except Exception:
-            print(traceback.format_exc())
+        # Do not use quotes that have not been updated for too long
+        updated = self.updated.get(symbol)
+        if updated is None or time.monotonic() - updated > self.max_age:
+            return None
+
+        quote = self.quotes.get(symbol, {})
 
-    async def sendMessage(
-        self, ws: aiohttp.ClientWebSocketResponse, func: str, args: List[str]
-    ) -> None:
+        try:
+            price = float(quote["lp"])
+            change = float(quote["ch"])
+            volume = float(quote.get("volume", 0))
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        if price == 0:
+            print("TradingView returns price=0")
+            return None
+
+        perc_change = round((change / price) * 100, 2)
+
+        return price, perc_change, volume
+
+    async def get_quotes(
+        self,
+        symbols: List[str],
+        timeout: float = 5,
+        partial_timeout: Optional[float] = None,
+    ) -> dict[str, Optional[tuple[float, float, float]]]:
         """
-        Sends a message to the TradingView API.
-        This needs to be done before any data can be retrieved.
+        Gets the current price, 24h change, and volume of multiple symbols at once.
+        All symbols that were not requested before are subscribed to in a single message.
 
         Parameters
         ----------
-        ws : aiohttp.ClientWebSocketResponse
-            The websocket object to send the message from.
-        func : str
-            The function to call, all start with ``quote_`` followed by the function name.
-        args : List[str]
-            The list of arguments to send in the message.
+        symbols : List[str]
+            The symbols formatted as "exchange:symbol".
+        timeout : float, optional
+            The maximum number of seconds to wait for all quotes, by default 5.
+        partial_timeout : float, optional
+            If given, only wait this many seconds for the remaining symbols once the first symbol has reported.
+            This way one symbol without data does not hold up the others until the timeout.
+
+        Returns
+        -------
+        dict[str, Optional[tuple[float, float, float]]]
+            The current price, 24h change, and volume per symbol, None if it is not available.
         """
 
-        as_json = json.dumps({"m": func, "p": args}, separators=(",", ":"))
-        prepended = "~m~" + str(len(as_json)) + "~m~" + as_json
-        await ws.send_str(prepended)
+        await self.subscribe(symbols)
 
-    def get_usd_info(self, tv_crypto, symbol: str, suffix: str):
-        if not symbol.endswith(suffix):
-            # If it crypto try adding USD or USDT
-            crypto_USD = tv_crypto.loc[tv_crypto["stock"] == symbol + suffix]
+        # A concurrent request can evict some of the symbols while this one is sending,
+        # subscribe to those once more and skip them if they get evicted again
+        evicted = [symbol for symbol in symbols if symbol not in self.subscribed]
+        if evicted:
+            await self.subscribe(evicted)
 
-            if not crypto_USD.empty:
-                return (
-                    crypto_USD["exchange"].values[0],
-                    "crypto",
-                    crypto_USD["stock"].values[0],
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        events = [
+            self.subscribed.get(symbol)
+            for symbol in symbols
+            if self.subscribed.get(symbol) is not None
+        ]
+        waiters = {
+            asyncio.ensure_future(event.wait())
+            for event in events
+            if not event.is_set()
+        }
+
+        # Stop waiting for the rest once the first symbol has reported
+        shortened = False
+        if partial_timeout is not None and len(waiters) < len(events):
+            deadline = min(deadline, loop.time() + partial_timeout)
+            shortened = True
+
+        try:
+            while waiters:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+
+                done, waiters = await asyncio.wait(
+                    waiters, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
                 )
 
+                if done and partial_timeout is not None and not shortened:
+                    deadline = min(deadline, loop.time() + partial_timeout)
+                    shortened = True
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+
+        return {symbol: self.get_values(symbol) for symbol in symbols}
+
+    async def get_quote(
+        self, symbol: str, timeout: float = 5
+    ) -> Optional[tuple[float, float, float]]:
+        """
+        Gets the current price, 24h change, and volume of a symbol.
+        The symbol is subscribed to if it was not requested before.
+
+        Parameters
+        ----------
+        symbol : str
+            The symbol formatted as "exchange:symbol".
+        timeout : float, optional
+            The maximum number of seconds to wait for the first quote, by default 5.
+
+        Returns
+        -------
+        Optional[tuple[float, float, float]]
+            The current price, 24h change, and volume.
+        """
+
+        quotes = await self.get_quotes([symbol], timeout)
+        return quotes[symbol]
+
+
+def build_symbol_index(tv_db: pd.DataFrame) -> dict[str, str]:
+    """
+    Makes a dictionary of the TradingView symbols, so the exchange of a symbol can be found in O(1).
+    If a symbol is listed on multiple exchanges, the first exchange in the data is used.
+
+    Parameters
+    ----------
+    tv_db : pd.DataFrame
+        The data from get_tv_ticker_data(), with the columns "stock" and "exchange".
+
+    Returns
+    -------
+    dict[str, str]
+        The symbol as key and the exchange as value.
+    """
+
+    if tv_db is None or tv_db.empty:
+        return {}
+
+    unique = tv_db.drop_duplicates(subset="stock", keep="first")
+    return dict(zip(unique["stock"].values, unique["exchange"].values))
+
+
+class TV_TA:
+    """
+    Collects the TA requests that are made within a short window of time,
+    so they can be retrieved using one scanner request per screener and interval.
+    The requests are done in a separate thread, so they do not block the event loop.
+    Results are cached for a few minutes, this can be configured under ["TRADINGVIEW"]["TA_CACHE"].
+    The hit ratio of the cache is printed every LOG_INTERVAL seconds, see stats().
+    """
+
+    def __init__(self, window: float = 0.1, timeout: float = 5) -> None:
+        self.window = window
+        self.timeout = timeout
+
+        # Recent results per ("EXCHANGE:SYMBOL", interval), each interval has its own TTL
+        cache_config = config.get("TRADINGVIEW", {}).get("TA_CACHE", {})
+        default_ttl = cache_config.get("TTL", 120)
+        self.ttl = {
+            Interval.INTERVAL_4_HOURS: cache_config.get("4H_TTL", default_ttl),
+            Interval.INTERVAL_1_DAY: cache_config.get("1D_TTL", 600),
+        }
+        self.cache = TTLCache(
+            max_size=cache_config.get("MAX_SIZE", 1000), ttl=default_ttl
+        )
+
+        # Print the cache statistics every this many seconds, 0 to disable
+        self.log_interval = cache_config.get("LOG_INTERVAL", 3600)
+        self.last_log = time.monotonic()
+
+        # The requested symbols per (screener, interval), e.g. {("crypto", "4h") : {"BINANCE:BTCUSDT" : [future]}}
+        self.pending = {}
+        self.flusher = None
+
+    async def get_analysis(
+        self, exchange: str, screener: str, symbol: str, interval: str
+    ) -> Optional[dict]:
+        """
+        Gets the TA summary of a symbol, the request is combined with the other requests in the window.
+
+        Parameters
+        ----------
+        exchange : str
+            The exchange the symbol is traded on, e.g. "BINANCE".
+        screener : str
+            The market the symbol is traded on, e.g. "crypto", "america", "forex".
+        symbol : str
+            The symbol itself.
+        interval : str
+            The interval of the TA, e.g. "4h" or "1d".
+
+        Returns
+        -------
+        Optional[dict]
+            The summary with the recommendation and the number of buy, neutral, and sell signals.
+        """
+
+        tv_symbol = f"{exchange}:{symbol}".upper()
+
+        summary = self.cache.get((tv_symbol, interval))
+        self.log_stats()
+        if summary is not None:
+            return summary
+
+        future = asyncio.get_running_loop().create_future()
+
+        requests = self.pending.setdefault((screener, interval), {})
+        requests.setdefault(tv_symbol, []).append(future)
+
+        if self.flusher is None:
+            self.flusher = asyncio.create_task(self.flush())
+
+        return await future
+
+    def stats(self) -> dict:
+        """
+        Returns the statistics of the TA cache, see TTLCache.stats().
+        """
+
+        return self.cache.stats()
+
+    def log_stats(self) -> None:
+        """
+        Prints the statistics of the TA cache, if the log interval has passed.
+        """
+
+        if not self.log_interval:
+            return
+
+        now = time.monotonic()
+        if now - self.last_log >= self.log_interval:
+            self.last_log = now
+            print("TradingView TA cache:", self.stats())
+
+    async def flush(self) -> None:
+        """
+        Waits for the window to pass and then requests all the pending TA data.
+        """
+
+        await asyncio.sleep(self.window)
+
+        pending, self.pending = self.pending, {}
+        self.flusher = None
+
+        await asyncio.gather(
+            *[
+                self.scan(screener, interval, requests)
+                for (screener, interval), requests in pending.items()
+            ]
+        )
+
+    async def scan(self, screener: str, interval: str, requests: dict) -> None:
+        """
+        Gets the TA data of multiple symbols using one request and sets the results.
+
+        Parameters
+        ----------
+        screener : str
+            The market of the symbols, e.g. "crypto", "america", "forex".
+        interval : str
+            The interval of the TA, e.g. "4h" or "1d".
+        requests : dict
+            The symbols formatted as "EXCHANGE:SYMBOL" with the futures waiting for them.
+        """
+
+        try:
+            analysis = await asyncio.get_running_loop().run_in_executor(
+                None,
+                functools.partial(
+                    get_multiple_analysis,
+                    screener=screener,
+                    interval=interval,
+                    symbols=list(requests),
+                    timeout=self.timeout,
+                ),
+            )
+        except Exception as e:
+            print(
+                f"TradingView TA error for tickers: {', '.join(requests)}, error:", e
+            )
+            analysis = {}
+
+        for symbol, futures in requests.items():
+            summary = analysis[symbol].summary if analysis.get(symbol) else None
+
+            if summary is not None:
+                self.cache.set((symbol, interval), summary, ttl=self.ttl.get(interval))
+
+            for future in futures:
+                # The future is cancelled if the request is not needed anymore
+                if not future.done():
+                    future.set_result(summary)
+
+
+class TV_data:
+    """
+    This class is used to get the current price, 24h change, and volume of a stock.
+    It also includes methods to get the TradingView TA data.
+    """
+
+    def __init__(self) -> None:
+        self.stock_indices_without_exch = [sym.split(":")[1] for sym in stock_indices]
+        self.crypto_indices_without_exch = [sym.split(":")[1] for sym in crypto_indices]
+        self.forex_indices_without_exch = [
+            sym.split(":")[1] for sym in all_forex_indices
+        ]
+
+        # The websocket that streams the quotes
+        self.quotes = TV_quotes(
+            max_age=config.get("TRADINGVIEW", {}).get("QUOTE_MAX_AGE", 600)
+        )
+
+        # Combines the TA requests
+        self.ta = TV_TA()
+
     def get_symbol_data(
         self, symbol: str, asset: str
     ) -> Optional[tuple[str, str, str]]:
         """
         Helper function to get the symbol data from the TradingView API.
         This data included the exchange and market this symbol is traded on.
+        Uses the symbol indices that are made in ``build_symbol_index()``.
 
         Parameters
         ----------
@@ -160,29 +676,64 @@ class TV_data:
                 The symbol itself.
         """
 
-        tv_stocks = util.vars.stocks
-        tv_crypto = util.vars.crypto
-        tv_forex = util.vars.forex
+        if asset not in markets:
+            return None
 
-        if asset == "stock":
-            stock = tv_stocks.loc[tv_stocks["stock"] == symbol]
-            if not stock.empty:
-                return stock["exchange"].values[0], "america", symbol
+        symbol_index = util.vars.tv_index.get(asset, {})
 
-        elif asset == "forex":
-            forex = tv_forex.loc[tv_forex["stock"] == symbol]
-            if not forex.empty:
-                return forex["exchange"].values[0], "forex", symbol
+        if symbol in symbol_index:
+            return symbol_index[symbol], markets[asset], symbol
 
+        if asset == "crypto":
+            # If it crypto try adding USD or USDT
+            for suffix in ["USD", "USDT", "USDTPERP"]:
+                if not symbol.endswith(suffix) and symbol + suffix in symbol_index:
+                    return symbol_index[symbol + suffix], "crypto", symbol + suffix
+
+    def get_tv_symbol(
+        self, symbol: str, asset: str
+    ) -> tuple[Optional[str], Optional[str], str]:
+        """
+        Gets the symbol as it is used by TradingView and the url to its chart.
+
+        Parameters
+        ----------
+        symbol: string
+            The ticker of the stock / crypto, e.g. "AAPL" or "BTCUSDT".
+        asset: string
+            The type of asset, either "stock", "crypto", or "forex".
+
+        Returns
+        -------
+        tuple[Optional[str], Optional[str], str]
+            str
+                The symbol formatted as "exchange:symbol", None if it is not on TradingView.
+            str
+                The exchange that this symbol is listed on.
+            str
+                The url to the TradingView chart for this symbol.
+        """
+
+        if asset == "stock":
+            website_suffix = "/?yahoo"
+        elif asset == "forex":
+            website_suffix = "/?forex"
         elif asset == "crypto":
-            crypto = tv_crypto.loc[tv_crypto["stock"] == symbol]
-            if not crypto.empty:
-                return crypto["exchange"].values[0], "crypto", symbol
-            else:
-                # Iterate over some USD suffixes
-                for s in ["USD", "USDT", "USDTPERP"]:
-                    if data := self.get_usd_info(tv_crypto, symbol, s):
-                        return data
+            website_suffix = "/?coingecko"
+
+        website = f"https://www.tradingview.com/symbols/{symbol}{website_suffix}"
+
+        symbol_data = self.get_symbol_data(symbol, asset)
+        if symbol_data is None:
+            return None, None, website
+
+        # Format it "exchange:symbol"
+        exchange = symbol_data[0]
+        website = (
+            f"https://www.tradingview.com/symbols/{symbol_data[2]}{website_suffix}"
+        )
+
+        return f"{exchange}:{symbol_data[2]}", exchange, website
 
     async def get_tv_data(
         self, symbol: str, asset: str
@@ -212,83 +763,82 @@ class TV_data:
                 The url to the TradingView chart for this symbol.
         """
 
-        if asset == "stock":
-            website_suffix = "/?yahoo"
-        elif asset == "forex":
-            website_suffix = "/?forex"
-        elif asset == "crypto":
-            website_suffix = "/?coingecko"
+        tv_data = await self.get_tv_data_many([symbol], asset)
+        return tv_data[symbol]
 
-        website = f"https://www.tradingview.com/symbols/{symbol}{website_suffix}"
+    async def get_tv_data_many(
+        self,
+        symbols: List[str],
+        asset: str,
+        timeout: float = 5,
+        partial: bool = True,
+    ) -> dict[str, tuple[float, float, float, str, str]]:
+        """
+        Gets the current price, volume, and 24h change of multiple symbols using one request.
 
-        try:
-            symbol_data = self.get_symbol_data(symbol, asset)
-            if symbol_data is not None:
-                # Format it "exchange:symbol"
-                exchange = symbol_data[0]
-                symbol = f"{exchange}:{symbol_data[2]}"
-                website = f"https://www.tradingview.com/symbols/{symbol_data[2]}{website_suffix}"
+        Parameters
+        ----------
+        symbols : List[str]
+            The tickers of the stocks / crypto, e.g. ["AAPL", "TSLA"].
+        asset : str
+            The type of asset, either "stock", "crypto", or "forex".
+        timeout : float, optional
+            The maximum number of seconds to wait for the data, by default 5.
+        partial : bool, optional
+            If True, do not wait the full timeout for symbols that do not report,
+            once the others have come in, by default True.
 
-            else:
-                return (0, None, 0, None, website)
-
-            # Create a session
-            session = aiohttp.ClientSession()
-
-            async with session.ws_connect(
-                url="wss://data.tradingview.com/socket.io/websocket",
-                headers={"Origin": "https://data.tradingview.com"},
-            ) as ws:
-                # This is mandatory to get the data
-                auth_str = "qs_" + "".join(
-                    random.choice(string.ascii_lowercase) for i in range(12)
-                )
+        Returns
+        -------
+        dict[str, tuple[float, float, float, str, str]]
+            The same data as get_tv_data() per symbol.
+        """
 
-                # Send messages via websocket
-                await self.sendMessage(ws, "quote_create_session", [auth_str])
-                await self.sendMessage(
-                    ws, "quote_set_fields", [auth_str, "ch", "lp", "volume"]
-                )
-                await self.sendMessage(ws, "quote_add_symbols", [auth_str, symbol])
-
-                counter = 0
-
-                # Check for response
-                async for msg in ws:
-                    counter += 1
-
-                    if msg.type == aiohttp.WSMsgType.TEXT:
-                        resp = await self.on_msg(ws, msg.data)
-
-                        if resp is not None:
-                            await ws.close()
-                            await session.close()
-                            # Convert to USD volume if asset is crypto
-                            return (
-                                resp[0],
-                                resp[1],
-                                resp[0] * resp[2] if asset == "crypto" else resp[2],
-                                exchange.lower(),
-                                website,
-                            )
-
-                        elif counter == 3:
-                            await session.close()
-                            return (0, None, 0, None, website)
-
-                    elif msg.type == aiohttp.WSMsgType.ERROR:
-                        # self.restart_sockets()
-                        print("TradingView websocket Error")
-                        await session.close()
-                        return (0, None, 0, None, website)
-
-        except aiohttp.ClientConnectionError:
-            print("Temporary TradingView websocket error")
+        tv_symbols = {}
+        result = {}
+
+        for symbol in symbols:
+            try:
+                tv_symbols[symbol] = self.get_tv_symbol(symbol, asset)
+            except Exception:
+                print(traceback.format_exc())
+                tv_symbols[symbol] = (None, None, None)
 
+            result[symbol] = (0, None, 0, None, tv_symbols[symbol][2])
+
+        to_request = [
+            tv_symbol for tv_symbol, _, _ in tv_symbols.values() if tv_symbol
+        ]
+        if not to_request:
+            return result
+
+        try:
+            quotes = await self.quotes.get_quotes(
+                to_request, timeout, partial_timeout=1 if partial else None
+            )
         except Exception:
             print(traceback.format_exc())
+            report_request_error("tradingview")
+            return result
+
+        for symbol, (tv_symbol, exchange, website) in tv_symbols.items():
+            resp = quotes.get(tv_symbol)
+
+            # TradingView lists the symbol, but its quote did not arrive
+            if tv_symbol and resp is None and tv_symbol not in self.quotes.errors:
+                report_request_error("tradingview")
+
+            if resp is not None:
+                # Convert to USD volume if asset is crypto
+                result[symbol] = (
+                    resp[0],
+                    resp[1],
+                    resp[0] * resp[2] if asset == "crypto" else resp[2],
+                    exchange.lower(),
+                    website,
+                )
 
-        return (0, None, 0, None, website)
+        return result
 
     def format_analysis(self, analysis: dict) -> str:
         """
@@ -307,7 +857,9 @@ class TV_data:
 
         return f"{analysis['RECOMMENDATION']}\n{analysis['BUY']}📈 {analysis['NEUTRAL']}⌛️ {analysis['SELL']}📉"
 
-    def get_tv_TA(self, symbol: str, asset: str) -> Optional[tuple[str, str]]:
+    async def get_tv_TA(
+        self, symbol: str, asset: str
+    ) -> Optional[tuple[str, str]]:
         """
         Gets the current TA (technical analysis) data from the TradingView API.
 
@@ -340,33 +892,18 @@ class TV_data:
         if symbol_data is not None:
             exchange, market, symbol = symbol_data
 
-            # Wait max 5 sec
-            try:
-                four_h_analysis = TA_Handler(
-                    symbol=symbol,
-                    screener=market,
-                    exchange=exchange,
-                    interval=Interval.INTERVAL_4_HOURS,
-                    timeout=5,
-                ).get_analysis()
-
-                one_d_analysis = TA_Handler(
-                    symbol=symbol,
-                    screener=market,
-                    exchange=exchange,
-                    interval=Interval.INTERVAL_1_DAY,
-                    timeout=5,
-                ).get_analysis()
-
-            except Exception as e:
-                print(f"TradingView TA error for ticker: {symbol}, error:", e)
-                return None, None
+            four_h_analysis, one_d_analysis = await asyncio.gather(
+                self.ta.get_analysis(
+                    exchange, market, symbol, Interval.INTERVAL_4_HOURS
+                ),
+                self.ta.get_analysis(exchange, market, symbol, Interval.INTERVAL_1_DAY),
+            )
 
             if four_h_analysis:
-                four_h_analysis = self.format_analysis(four_h_analysis.summary)
+                four_h_analysis = self.format_analysis(four_h_analysis)
 
             if one_d_analysis:
-                one_d_analysis = self.format_analysis(one_d_analysis.summary)
+                one_d_analysis = self.format_analysis(one_d_analysis)
 
             # Format the analysis
             return four_h_analysis, one_d_analysis
@@ -1,7 +1,8 @@
 ## > Imports
 # > Standard libaries
 from __future__ import annotations
-from typing import List
+from typing import List, Optional
+import asyncio
 import datetime
 
 # Discord imports
@@ -9,15 +10,15 @@ import discord
 from discord.ext import commands
 
 # 3rd party imports
-import pandas as pd
 import numpy as np
 
 # Local dependencies
 import util.vars
 from util.ticker_classifier import classify_ticker, get_financials
 from util.sentiment_analyis import add_sentiment
-from util.vars import filter_dict, data_sources
-from util.db import merge_and_update, remove_old_rows, update_tweet_db
+from util.vars import config, filter_dict, data_sources
+from util.db import update_tweet_db
+from util.ticker_store import classified_tickers
 from cogs.loops.overview import Overview
 
 tweet_overview = None
@@ -173,85 +174,60 @@ async def add_financials(
     base_symbols = []
     categories = []
     do_last = []
-    classified_tickers = []
     changes = []
 
-    if not util.vars.classified_tickers.empty:
-        # Drop tickers older than 3 days
-        util.vars.classified_tickers = remove_old_rows(util.vars.classified_tickers, 3)
-        classified_tickers = util.vars.classified_tickers["ticker"].tolist()
-
-    for ticker in symbols:
-        if crypto > stocks and crypto > forex:
-            majority = "crypto"
-        elif stocks > crypto and stocks > forex:
-            majority = "stocks"
-        elif forex > crypto and forex > stocks:
-            majority = "forex"
-        else:
-            majority = "Unknown"
-
-        # Get the information about the ticker
-        if ticker not in classified_tickers:
-            ticker_info = await classify_ticker(ticker, majority)
-            if ticker_info:
-                (
-                    _,
-                    website,
-                    exchanges,
-                    price,
-                    change,
-                    four_h_ta,
-                    one_d_ta,
-                    base_symbol,
-                ) = ticker_info
-
-                # Skip if this ticker has been done before, for instance in tweets containing Solana and SOL
-                if base_symbol in base_symbols:
-                    continue
-
-                # Db cannot save lists
-                if exchanges == []:
-                    exchanges = None
-
-                # Convert info to a dataframe
-                df = pd.DataFrame(
-                    [
-                        {
-                            "ticker": ticker,
-                            "website": website,
-                            "exchanges": ";".join(exchanges),
-                            "base_symbol": base_symbol,
-                            "timestamp": datetime.datetime.now(),
-                        }
-                    ]
-                )
+    # Guess the majority using the tickers that have been classified before
+    majority = get_majority(
+        [
+            get_category(classified_tickers.get(ticker)[0])
+            for ticker in symbols
+            if ticker in classified_tickers
+        ]
+    )
+
+    # Get the information of all tickers at the same time
+    semaphore = asyncio.Semaphore(
+        config.get("CLASSIFIER", {}).get("MAX_CONCURRENT", 8)
+    )
 
-                # Save the ticker info in a database
-                util.vars.classified_tickers = merge_and_update(
-                    util.vars.classified_tickers, df, "classified_tickers"
+    async def limited_ticker_info(ticker: str) -> Optional[tuple]:
+        async with semaphore:
+            return await get_ticker_info(ticker, majority)
+
+    ticker_infos = await asyncio.gather(
+        *[limited_ticker_info(ticker) for ticker in symbols]
+    )
+
+    # Add the information in the original order
+    for ticker, ticker_info in zip(symbols, ticker_infos):
+        if ticker_info is None:
+            if ticker in tickers:
+                e.add_field(name=f"${ticker}", value=majority)
+                print(
+                    f"No crypto or stock match found for ${ticker} in {user}'s tweet at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}"
                 )
 
-            else:
-                if ticker in tickers:
-                    e.add_field(name=f"${ticker}", value=majority)
-                    print(
-                        f"No crypto or stock match found for ${ticker} in {user}'s tweet at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}"
-                    )
+            # Go to next in symbols
+            continue
 
-                # Go to next in symbols
+        (
+            website,
+            exchanges,
+            price,
+            change,
+            four_h_ta,
+            one_d_ta,
+            base_symbol,
+            is_new,
+        ) = ticker_info
+
+        if is_new:
+            # Skip if this ticker has been done before, for instance in tweets containing Solana and SOL
+            if base_symbol in base_symbols:
                 continue
-        else:
-            ticker_info = util.vars.classified_tickers[
-                util.vars.classified_tickers["ticker"] == ticker
-            ]
-            website = ticker_info["website"].values[0]
-            exchanges = ticker_info["exchanges"].values[0]
-            exchanges = exchanges.split(";")
-            base_symbol = ticker_info["base_symbol"].values[0]
 
-            # Still need the price, change, TA info
-            price, change, four_h_ta, one_d_ta = await get_financials(ticker, website)
+            # Save the ticker info, so it does not need to be classified again
+            classified_tickers.add(ticker, website, exchanges, base_symbol)
 
         title = f"${ticker}"
 
@@ -304,7 +280,7 @@ async def add_financials(
 
     # Finally add the sentiment to the embed
     if base_symbols:  # or if categories:
-        e, prediction = add_sentiment(e, text)
+        e, prediction = await add_sentiment(e, text)
     else:
         prediction = None
 
@@ -328,6 +304,105 @@ async def add_financials(
     return e, category, base_symbols
 
 
+def get_majority(categories: List[Optional[str]]) -> str:
+    """
+    Returns the most common category, "Unknown" if there is no single most common one.
+
+    Parameters
+    ----------
+    categories : List[Optional[str]]
+        The categories of the tickers, either "crypto", "stocks", "forex", or None.
+
+    Returns
+    -------
+    str
+        The majority, either "crypto", "stocks", "forex", or "Unknown".
+    """
+
+    crypto = categories.count("crypto")
+    stocks = categories.count("stocks")
+    forex = categories.count("forex")
+
+    if crypto > stocks and crypto > forex:
+        return "crypto"
+    elif stocks > crypto and stocks > forex:
+        return "stocks"
+    elif forex > crypto and forex > stocks:
+        return "forex"
+    return "Unknown"
+
+
+def get_category(website: Optional[str]) -> Optional[str]:
+    """
+    Returns the category of a ticker based on the website of its data.
+    """
+
+    if website:
+        if "coingecko" in website:
+            return "crypto"
+        if "yahoo" in website:
+            return "stocks"
+        if "forex" in website:
+            return "forex"
+
+
+async def get_ticker_info(
+    ticker: str, majority: str
+) -> Optional[tuple[str, List[str], float, str, str, str, str, bool]]:
+    """
+    Gets the financial information of a ticker.
+    If the ticker has been classified before, only the price, change, and TA are requested.
+
+    Parameters
+    ----------
+    ticker : str
+        The ticker mentioned in the tweet.
+    majority : str
+        The guessed majority of the tweet.
+
+    Returns
+    -------
+    Optional[tuple[str, List[str], float, str, str, str, str, bool]]
+        The website, exchanges, price, change, 4h TA, 1d TA, base symbol,
+        and whether the ticker was newly classified. None if the ticker could not be classified.
+    """
+
+    classified_info = classified_tickers.get(ticker)
+    if classified_info:
+        website, exchanges, base_symbol = classified_info
+
+        # Still need the price, change, TA info
+        price, change, four_h_ta, one_d_ta = await get_financials(ticker, website)
+
+        return (
+            website,
+            exchanges,
+            price,
+            change,
+            four_h_ta,
+            one_d_ta,
+            base_symbol,
+            False,
+        )
+
+    ticker_info = await classify_ticker(ticker, majority)
+    if not ticker_info:
+        return None
+
+    (
+        _,
+        website,
+        exchanges,
+        price,
+        change,
+        four_h_ta,
+        one_d_ta,
+        base_symbol,
+    ) = ticker_info
+
+    return website, exchanges, price, change, four_h_ta, one_d_ta, base_symbol, True
+
+
 def get_clean_symbols(tickers, hashtags):
     # Remove #NFT from the list
     hashtags = [hashtag for hashtag in hashtags if hashtag != "NFT"]
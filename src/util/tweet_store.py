@@ -0,0 +1,153 @@
+##> Imports
+# > Standard libaries
+from __future__ import annotations
+import datetime
+import threading
+from collections import deque
+
+# > 3rd party dependencies
+import pandas as pd
+
+# > Local dependencies
+from util.vars import config
+from util.datastore import execute_many, delete_where
+
+
+class SeenTweets:
+    """
+    Remembers the IDs of the most recent processed tweets, so a tweet is never posted twice, also not after a restart.
+    The IDs are kept in a bounded set, once it is full the oldest ID is forgotten.
+    Tweets older than every ID that is still remembered are treated as seen.
+    This way a tweet that arrives out of order is still posted, as long as it is newer than that floor.
+    A tweet is marked as seen by add() once it is parsed, but only saved after save() is called once it is posted.
+    The saved IDs are written in batches by flush(), the table is pruned to the same size as the set.
+    """
+
+    def __init__(self, max_size: int = 2000, database_name: str = "seen_tweets") -> None:
+        """
+        Parameters
+        ----------
+        max_size : int, optional
+            The maximum number of IDs that are remembered, by default 2000.
+        database_name : str, optional
+            The name of the database the IDs are saved in, by default "seen_tweets".
+        """
+        self.max_size = max_size
+        self.database_name = database_name
+
+        self.ids = set()
+        # The IDs in the order they were added, used to forget the oldest one
+        self.order = deque()
+
+        # The tweets with an ID up to the floor are treated as seen
+        self.floor = 0
+        # The highest ID that has been seen
+        self.latest_id = 0
+
+        # Rows that still need to be saved
+        self.pending = []
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, tweet_id: int) -> bool:
+        return tweet_id <= self.floor or tweet_id in self.ids
+
+    def load(self, db: pd.DataFrame) -> None:
+        """
+        Adds the IDs saved in the database, e.g. after a restart.
+        Tweets older than the oldest saved ID will not be posted again.
+
+        Parameters
+        ----------
+        db : pd.DataFrame
+            The seen_tweets database.
+        """
+
+        if db.empty:
+            return
+
+        ids = sorted(int(tweet_id) for tweet_id in db["id"])[-self.max_size :]
+
+        self.ids.update(ids)
+        self.order.extend(ids)
+        self.floor = max(self.floor, ids[0] - 1)
+        self.latest_id = max(self.latest_id, ids[-1])
+
+    def add(self, tweet_id: int) -> bool:
+        """
+        Marks a tweet as seen, use save() to remember it after a restart.
+
+        Parameters
+        ----------
+        tweet_id : int
+            The ID of the tweet.
+
+        Returns
+        -------
+        bool
+            True if the tweet had not been seen before.
+        """
+
+        if tweet_id in self:
+            return False
+
+        self.ids.add(tweet_id)
+        self.order.append(tweet_id)
+        self.latest_id = max(self.latest_id, tweet_id)
+
+        # Forget the oldest ID, older tweets are treated as seen from now on
+        while len(self.order) > self.max_size:
+            oldest = self.order.popleft()
+            self.ids.discard(oldest)
+            self.floor = max(self.floor, oldest)
+
+        return True
+
+    def save(self, tweet_id: int) -> None:
+        """
+        Saves the tweet as seen on the next flush(), e.g. once it has been posted.
+
+        Parameters
+        ----------
+        tweet_id : int
+            The ID of the tweet.
+        """
+
+        with self.lock:
+            self.pending.append((tweet_id, str(datetime.datetime.now())))
+
+    def flush(self) -> int:
+        """
+        Queues the saved IDs to be written to the database and removes the ones that were forgotten.
+
+        Returns
+        -------
+        int
+            The number of queued IDs.
+        """
+
+        with self.lock:
+            rows = self.pending
+            self.pending = []
+
+        if not rows:
+            return 0
+
+        execute_many(
+            f"INSERT OR IGNORE INTO {self.database_name} (id, timestamp) VALUES (?, ?)",
+            rows,
+        )
+        delete_where(
+            self.database_name,
+            f"id NOT IN (SELECT id FROM {self.database_name} ORDER BY id DESC LIMIT ?)",
+            (self.max_size,),
+        )
+
+        return len(rows)
+
+
+seen_tweets = SeenTweets(
+    max_size=config["LOOPS"]["TIMELINE"].get("SEEN_TWEETS", 2000)
+)
@@ -1,12 +1,17 @@
 import sys
 import os
 import json
+import asyncio
+import contextvars
 
 # > 3rd Party Dependencies
 import yaml
 import aiohttp
 import pandas as pd
 
+# > Local dependencies
+from util.cache import TTLCache
+
 # Read config.yaml content
 config_path = os.path.join(os.path.dirname(__file__), "..", "..", "config.yaml")
 with open(config_path, "r", encoding="utf-8") as f:
@@ -77,9 +82,8 @@ stables = [
 assets_db = None
 portfolio_db = None
 cg_db = None
-tweets_db = None
+cg_index = {"symbol": {}, "id": {}, "name": {}}
 options_db = None
-latest_tweet_id = 0
 
 # These variables save the TradingView tickers
 stocks = None
@@ -87,15 +91,95 @@ crypto = None
 forex = None
 cfd = None
 
+# The symbol -> exchange dictionaries of the variables above, per asset type
+tv_index = {}
+
 nasdaq_tickers = None
 
 reddit_ids = pd.DataFrame()
 ideas_ids = pd.DataFrame()
-classified_tickers = pd.DataFrame()
+
+# Tickers that could not be classified, so they are not looked up again until they expire
+unclassified_tickers = TTLCache(
+    max_size=config.get("CLASSIFIER", {}).get("UNCLASSIFIED_SIZE", 10000),
+    ttl=config.get("CLASSIFIER", {}).get("UNCLASSIFIED_TTL", 21600),
+)
 
 custom_emojis = {}
 
 
+# Shared HTTP session, created on first use by get_session()
+session = None
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """
+    Returns the process-wide aiohttp session, creating it if needed.
+    All HTTP(S) requests share its connection pool, so connections to the same host
+    are kept alive and reused instead of doing a new TCP + TLS handshake per request.
+    The connection limits can be configured in the config under ["HTTP"].
+
+    Returns
+    -------
+    aiohttp.ClientSession
+        The shared session.
+    """
+    global session
+
+    if session is None or session.closed:
+        http_config = config.get("HTTP", {})
+        connector = aiohttp.TCPConnector(
+            limit=http_config.get("LIMIT", 100),
+            limit_per_host=http_config.get("LIMIT_PER_HOST", 10),
+            ttl_dns_cache=http_config.get("DNS_CACHE_TTL", 300),
+            keepalive_timeout=http_config.get("KEEPALIVE_TIMEOUT", 30),
+        )
+        kwargs = {}
+        # Without a configured timeout the default of aiohttp is used
+        if http_config.get("TIMEOUT"):
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=http_config["TIMEOUT"])
+
+        session = aiohttp.ClientSession(
+            connector=connector,
+            # Do not share cookies between requests, only send the ones that are given
+            cookie_jar=aiohttp.DummyCookieJar(),
+            **kwargs,
+        )
+
+    return session
+
+
+async def close_session() -> None:
+    """
+    Closes the shared aiohttp session, should be called when the bot shuts down.
+    """
+    global session
+
+    if session is not None and not session.closed:
+        await session.close()
+    session = None
+
+
+# The failed requests of the current task and the tasks it started, None if they are not tracked
+# Set it to an empty list to find out if the result of a lookup is reliable, see classify_ticker()
+request_errors = contextvars.ContextVar("request_errors", default=None)
+
+
+def report_request_error(source: str) -> None:
+    """
+    Adds a failed request to request_errors, if the current task tracks them.
+
+    Parameters
+    ----------
+    source : str
+        The URL or name of the source that failed.
+    """
+
+    errors = request_errors.get()
+    if errors is not None:
+        errors.append(source)
+
+
 async def get_json_data(
     url: str, headers: dict = None, cookies: dict = None, text: bool = False
 ) -> dict:
@@ -116,16 +200,24 @@ async def get_json_data(
     """
 
     try:
-        async with aiohttp.ClientSession(headers=headers, cookies=cookies) as session:
-            async with session.get(url) as r:
-                if text:
-                    return await r.text()
-                else:
-                    return await r.json()
+        client = await get_session()
+        async with client.get(url, headers=headers, cookies=cookies) as r:
+            # Rate limited or a server error, the response says nothing about the request
+            if r.status == 429 or r.status >= 500:
+                report_request_error(url)
+
+            if text:
+                return await r.text()
+            else:
+                return await r.json()
     except aiohttp.ClientError as e:
         print(f"Error with get request for {url}.\nError: {e}")
+    except asyncio.TimeoutError:
+        print(f"Timeout with get request for {url}.")
     except json.JSONDecodeError as e:
         print(f"Error decoding JSON from {url}.\nError: {e}")
+
+    report_request_error(url)
     return {}
 
 
@@ -152,9 +244,9 @@ async def post_json_data(
     """
 
     try:
-        async with aiohttp.ClientSession(headers=headers) as session:
-            async with session.post(url, data=data, json=json) as r:
-                return await r.json(content_type=None)
+        client = await get_session()
+        async with client.post(url, headers=headers, data=data, json=json) as r:
+            return await r.json(content_type=None)
     except Exception as e:
         print(f"Error with POST request for {url}.", "Error:", e)
 
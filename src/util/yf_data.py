@@ -2,31 +2,251 @@
 # > Standard libaries
 from __future__ import annotations
 from typing import Optional, List
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 
 # > 3rd Party Dependencies
 import yfinance as yf
 
 # Local dependencies
+from util.vars import config, report_request_error
+from util.cache import TTLCache
 from util.formatting import format_change
 from util.afterhours import afterHours
 from util.tv_data import tv
 
+try:
+    # Handles the cookie and crumb that Yahoo requires
+    from yfinance.data import YfData
+except ImportError:
+    YfData = None
 
-def get_AH_info(stock_info):
+
+def get_bulk_info(tickers: List[str]) -> dict[str, dict]:
+    """
+    Gets the quotes of multiple tickers using one request to Yahoo Finance.
+    The quotes contain the same keys as ``yf.Ticker(ticker).info`` that are used in this module.
+
+    Parameters
+    ----------
+    tickers : List[str]
+        The tickers to get the quotes of.
+
+    Returns
+    -------
+    dict[str, dict]
+        The quote per ticker, tickers that Yahoo does not know are left out.
+    """
+
+    if YfData is None:
+        return {}
+
+    response = YfData().get_raw_json(
+        "https://query1.finance.yahoo.com/v7/finance/quote",
+        params={"symbols": ",".join(tickers)},
+    )
+
+    quotes = {
+        quote["symbol"].upper(): quote
+        for quote in response["quoteResponse"]["result"]
+    }
+
+    return {ticker: quotes[ticker.upper()] for ticker in tickers if ticker.upper() in quotes}
+
+
+def is_not_found(error: Exception) -> bool:
+    """
+    Checks if the error means that Yahoo Finance does not know the ticker, instead of the request failing.
+    """
+
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) == 404 or "404" in str(error)
+
+
+def get_info(tickers: List[str]) -> tuple[dict[str, dict], set]:
+    """
+    Gets the info of the tickers, this is blocking and should be run in a separate thread.
+    Multiple tickers are requested at once, tickers that are missing in that response are requested separately.
+
+    Parameters
+    ----------
+    tickers : List[str]
+        The tickers to get the info of.
+
+    Returns
+    -------
+    tuple[dict[str, dict], set]
+        dict[str, dict]
+            The info per ticker, an empty dict if it could not be found.
+        set
+            The tickers for which the request failed, e.g. because of the network or a rate limit.
+    """
+
+    infos = {}
+    failed = set()
+
+    if len(tickers) > 1:
+        try:
+            infos = get_bulk_info(tickers)
+        except Exception as e:
+            print("Error getting bulk quotes from Yahoo Finance:", e)
+
+    for ticker in tickers:
+        if ticker not in infos:
+            try:
+                infos[ticker] = yf.Ticker(ticker).info
+            except Exception as e:
+                infos[ticker] = {}
+                if not is_not_found(e):
+                    failed.add(ticker)
+
+    return infos, failed
+
+
+class YF_quotes:
+    """
+    Gets the Yahoo Finance info in a bounded thread pool, so the slow yfinance calls do not block the event loop.
+    Concurrent requests for the same ticker share one call and the results are cached for a while.
+    It can be configured in the config under ["YAHOO"].
+    """
+
+    def __init__(self) -> None:
+        yf_config = config.get("YAHOO", {})
+
+        self.executor = ThreadPoolExecutor(
+            max_workers=yf_config.get("MAX_WORKERS", 4),
+            thread_name_prefix="yfinance",
+        )
+        self.cache = TTLCache(
+            max_size=yf_config.get("CACHE_SIZE", 500),
+            ttl=yf_config.get("CACHE_TTL", 60),
+        )
+
+        # The tickers that are being requested right now and the futures that will get their info
+        self.in_flight = {}
+        # The running requests, a reference is kept so they are not garbage collected
+        self.requests = set()
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False)
+
+    async def get_info(self, ticker: str) -> dict:
+        """
+        Gets the info of a ticker, the same as ``yf.Ticker(ticker).info``.
+
+        Parameters
+        ----------
+        ticker : str
+            The ticker of the stock.
+
+        Returns
+        -------
+        dict
+            The info of the ticker, an empty dict if it could not be found.
+        """
+
+        infos = await self.get_info_many([ticker])
+        return infos[ticker]
+
+    async def get_info_many(self, tickers: List[str]) -> dict[str, dict]:
+        """
+        Gets the info of multiple tickers, the tickers that are not cached are requested at once.
+
+        Parameters
+        ----------
+        tickers : List[str]
+            The tickers of the stocks.
+
+        Returns
+        -------
+        dict[str, dict]
+            The info per ticker, an empty dict if it could not be found.
+        """
+
+        loop = asyncio.get_running_loop()
+
+        infos = {}
+        waiting = {}
+        to_request = {}
+
+        for ticker in dict.fromkeys(tickers):
+            info = self.cache.get(ticker)
+
+            if info is not None:
+                infos[ticker] = info
+            elif ticker in self.in_flight:
+                waiting[ticker] = self.in_flight[ticker]
+            else:
+                to_request[ticker] = loop.create_future()
+
+        if to_request:
+            self.in_flight.update(to_request)
+            waiting.update(to_request)
+
+            # The request does not belong to this caller, so cancelling this caller does not affect the others
+            task = asyncio.ensure_future(self.request(to_request))
+            self.requests.add(task)
+            task.add_done_callback(self.requests.discard)
+
+        for ticker, future in waiting.items():
+            # Shield, so a cancelled caller does not cancel the request
+            infos[ticker], ticker_failed = await asyncio.shield(future)
+            if ticker_failed:
+                report_request_error("yahoo")
+
+        return infos
+
+    async def request(self, futures: dict[str, asyncio.Future]) -> None:
+        """
+        Gets the info of the tickers in the thread pool, caches it, and sets the futures of the waiting callers.
+
+        Parameters
+        ----------
+        futures : dict[str, asyncio.Future]
+            The future per ticker, its result is the info and whether the request failed.
+        """
+
+        loop = asyncio.get_running_loop()
+        result = {}
+        failed = set(futures)
+
+        try:
+            result, failed = await loop.run_in_executor(
+                self.executor, get_info, list(futures)
+            )
+        except Exception as e:
+            print("Error getting info from Yahoo Finance:", e)
+        finally:
+            for ticker, future in futures.items():
+                info = result.get(ticker, {})
+
+                # Only cache the tickers that were found
+                if info:
+                    self.cache.set(ticker, info)
+
+                self.in_flight.pop(ticker, None)
+                if not future.done():
+                    future.set_result((info, ticker in failed))
+
+
+yf_quotes = YF_quotes()
+
+
+def get_AH_info(info: dict):
     price = change = None
 
-    if stock_info.info["preMarketPrice"] != None and stock_info.info["bid"] != None:
+    if info.get("preMarketPrice") != None and info.get("bid") != None:
         # Use bid if premarket price is not available
         price = (
-            round(stock_info.info["preMarketPrice"], 2)
-            if stock_info.info["preMarketPrice"] != None
-            else stock_info.info["bid"]
+            round(info["preMarketPrice"], 2)
+            if info["preMarketPrice"] != None
+            else info["bid"]
         )
 
-        if price and stock_info.info["regularMarketPrice"]:
+        if price and info.get("regularMarketPrice"):
             change = round(
-                (price - stock_info.info["regularMarketPrice"])
-                / stock_info.info["regularMarketPrice"]
+                (price - info["regularMarketPrice"])
+                / info["regularMarketPrice"]
                 * 100,
                 2,
             )
@@ -35,16 +255,16 @@ def get_AH_info(stock_info):
     return price, change
 
 
-def get_standard_info(stock_info):
+def get_standard_info(info: dict):
     price = change = None
 
-    if stock_info.info["regularMarketPrice"] != None:
-        price = round(stock_info.info["regularMarketPrice"], 2)
+    if info.get("regularMarketPrice") != None:
+        price = round(info["regularMarketPrice"], 2)
 
-        if price and stock_info.info["regularMarketPreviousClose"]:
+        if price and info.get("regularMarketPreviousClose"):
             change = round(
-                (price - stock_info.info["regularMarketPreviousClose"])
-                / stock_info.info["regularMarketPreviousClose"]
+                (price - info["regularMarketPreviousClose"])
+                / info["regularMarketPreviousClose"]
                 * 100,
                 2,
             )
@@ -84,10 +304,10 @@ async def get_stock_info(
     """
 
     if asset_type == "stock":
-        stock_info = yf.Ticker(ticker)
+        stock_info = await yf_quotes.get_info(ticker)
 
         try:
-            if stock_info.info["regularMarketPrice"] != None:
+            if stock_info.get("regularMarketPrice") != None:
                 prices = []
                 changes = []
 
@@ -109,7 +329,7 @@ async def get_stock_info(
 
                 # Return the important information
                 # Could also try 'volume' or 'volume24Hr' (is None if market is closed)
-                volume = stock_info.info["regularMarketVolume"] * price
+                volume = stock_info["regularMarketVolume"] * price
 
                 if changes == []:
                     changes = "N/A"
@@ -117,7 +337,7 @@ async def get_stock_info(
                 return (
                     volume,
                     f"https://finance.yahoo.com/quote/{ticker}",
-                    stock_info.info["exchange"],
+                    stock_info["exchange"],
                     prices,
                     changes,
                     ticker,